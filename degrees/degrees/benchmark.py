@@ -0,0 +1,170 @@
+import argparse
+import importlib.util
+import multiprocessing
+import random
+import resource
+import sys
+import time
+
+import ingest
+
+# Ways of loading the data, and the search modes each supports
+LOADS = {
+    "dict": ["bfs", "bidirectional"],
+    "csr": ["bfs", "bidirectional", "astar", "vectorized"],
+    "cache": ["bfs", "bidirectional", "astar", "vectorized"]
+}
+
+
+def sample_pairs(directory, count, seed=None):
+    """
+    Returns `count` random (source, target) pairs of person IDs from
+    `directory`, reading people.csv in one streaming pass.
+    """
+    rng = random.Random(seed)
+    sample = []
+    for i, (person_id,) in enumerate(ingest.read_rows(f"{directory}/people.csv", ("id",))):
+        # Reservoir sampling keeps a uniform sample of 2 * count IDs
+        if len(sample) < 2 * count:
+            sample.append(person_id)
+        else:
+            j = rng.randrange(i + 1)
+            if j < len(sample):
+                sample[j] = person_id
+    rng.shuffle(sample)
+    return list(zip(sample[0::2], sample[1::2]))
+
+
+def peak_memory():
+    """
+    Returns the peak resident memory of this process in MiB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def run(directory, load, modes, pairs, workers):
+    """
+    Load `directory` the way named by `load` and time every search mode
+    in `modes` over `pairs`. Meant to run in a fresh process, so that
+    peak memory covers this load alone.
+    """
+    import degrees
+
+    result = {"load": load, "modes": {}}
+    start = time.perf_counter()
+    degrees.load_data(directory, csr=load != "dict", cache=load == "cache", workers=workers)
+    result["load_time"] = time.perf_counter() - start
+    result["load_memory"] = peak_memory()
+
+    if "astar" in modes:
+        start = time.perf_counter()
+        degrees.load_landmarks(directory)
+        result["landmark_time"] = time.perf_counter() - start
+
+    for mode in modes:
+        search = degrees.SEARCH_MODES[mode]
+        # Latencies and people explored, kept apart for pairs with and
+        # without a path, since unreachable pairs mostly end at once
+        stats = {True: ([], []), False: ([], [])}
+        for source, target in pairs:
+            start = time.perf_counter()
+            path = search(source, target)
+            latencies, explored = stats[path is not None]
+            latencies.append(time.perf_counter() - start)
+            explored.append(degrees.search_stats["explored"])
+        result["modes"][mode] = {
+            "reachable" if found else "unreachable": {
+                "latencies": latencies,
+                "explored": sum(explored) / len(explored) if explored else 0
+            }
+            for found, (latencies, explored) in stats.items()
+        }
+
+    result["peak_memory"] = peak_memory()
+    return result
+
+
+def send_result(connection, args):
+    connection.send(run(*args))
+    connection.close()
+
+
+def run_in_process(*args):
+    """
+    Returns the result of `run(*args)` from a freshly spawned process.
+
+    The process is not a pool worker, so that loading with `workers`
+    can start processes of its own.
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=send_result, args=(sender, args))
+    process.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    except EOFError:
+        raise Exception(f"benchmark process exited with code {process.exitcode}")
+    finally:
+        process.join()
+
+
+def percentile(values, q):
+    """
+    Returns the `q`th percentile of `values` (nearest rank).
+    """
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q / 100 * len(values)))]
+
+
+def report(result, out=sys.stdout):
+    """
+    Print the timings and memory use measured by `run`.
+    """
+    out.write(f"{result['load']}: loaded in {result['load_time']:.2f}s, "
+              f"{result['load_memory']:.0f} MiB peak after loading, "
+              f"{result['peak_memory']:.0f} MiB peak overall\n")
+    if "landmark_time" in result:
+        out.write(f"  landmark index ready in {result['landmark_time']:.2f}s\n")
+    out.write(f"  {'mode':<14}{'pairs':<13}{'count':>6}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}"
+              f"{'explored':>12}\n")
+    for mode, by_pairs in result["modes"].items():
+        for kind, stats in by_pairs.items():
+            latencies = stats["latencies"]
+            if not latencies:
+                continue
+            out.write(f"  {mode:<14}{kind:<13}{len(latencies):>6}"
+                      f"{percentile(latencies, 50) * 1000:>10.2f}"
+                      f"{percentile(latencies, 90) * 1000:>10.2f}"
+                      f"{percentile(latencies, 99) * 1000:>10.2f}"
+                      f"{stats['explored']:>12.0f}\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loading and searching a degrees dataset.")
+    parser.add_argument("directory")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--loads", nargs="+", choices=LOADS, default=list(LOADS))
+    parser.add_argument("--modes", nargs="+", choices=LOADS["csr"], default=LOADS["csr"])
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes for parsing the CSVs")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if importlib.util.find_spec("numpy") is None:
+        args.modes = [mode for mode in args.modes if mode != "vectorized"]
+
+    pairs = sample_pairs(args.directory, args.queries, args.seed)
+    print(f"{len(pairs)} queries over {args.directory}")
+
+    for load in args.loads:
+        modes = [mode for mode in args.modes if mode in LOADS[load]]
+        if load == "cache":
+            # Write the snapshot and landmarks first, so only reading them is timed
+            run_in_process(args.directory, load, modes, [], args.workers)
+        report(run_in_process(args.directory, load, modes, pairs, args.workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,21 @@
+import argparse
 import csv
+import functools
+import itertools
+import json
+import multiprocessing
+import os
 import sys
+from array import array
 
-from util import Node, StackFrontier, QueueFrontier
+import ingest
+import paths
+import snapshot
+from graph import INDEX, CoStarGraph
+from landmarks import LandmarkIndex
+from nameindex import NameIndex
+from store import InternedColumn, SortedIndex, StringColumn, tables
+from util import Node, DequeQueueFrontier
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,11 +26,55 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Integer-interned co-star graph, when loaded with `csr=True`; the
+# three mappings above are then columnar tables over it (see store.py)
+graph = None
 
-def load_data(directory):
+# Maps person_ids to the number of their connected component, when
+# the graph above is not loaded; labelled once a search finds no path
+components = {}
+
+# Landmark distances over the graph, for A* search and estimates
+landmarks = None
+
+# Prefix and trigram index over the keys of `names`, built on first use
+name_index = None
+
+# Number of people expanded by the last search
+search_stats = {"explored": 0}
+
+
+def load_data(directory, csr=False, cache=False, workers=None):
     """
     Load data from CSV files into memory.
+
+    If `csr` is True, the person/movie links are interned into a
+    `CoStarGraph` instead of per-record sets, and searches run over it.
+    The CSVs are then parsed in chunks across `workers` processes.
+
+    If `cache` is True, the graph is memory-mapped from a snapshot in
+    `directory` when one matches the CSV files, and a snapshot is
+    written after parsing them otherwise. Implies `csr`.
+
+    Returns the number of rows of stars.csv that were dropped for
+    naming an unknown person or movie.
     """
+    global graph, names, people, movies, landmarks, name_index
+
+    graph, landmarks, name_index = None, None, None
+    names, people, movies = {}, {}, {}
+    components.clear()
+
+    if cache:
+        dropped = load_snapshot(directory)
+        if dropped is None:
+            dropped = load_graph(directory, workers)
+            snapshot.write(directory, graph, people, movies, names, dropped)
+        return dropped
+
+    if csr:
+        return load_graph(directory, workers)
+
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
@@ -42,25 +100,213 @@ def load_data(directory):
             }
 
     # Load stars
+    dropped = 0
     with open(f"{directory}/stars.csv", encoding="utf-8") as f:
         reader = csv.DictReader(f)
         for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+            person_id, movie_id = row["person_id"], row["movie_id"]
+            if person_id not in people or movie_id not in movies:
+                dropped += 1
+                continue
+            people[person_id]["movies"].add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+
+    return dropped
+
+
+def label_components():
+    """
+    Label every person with the number of their connected component,
+    so that searches between components end immediately.
+
+    Each movie's stars are visited once, the first time the movie is
+    reached, rather than once for every star who reaches it.
+    """
+    components.clear()
+    reached = set()
+    count = 0
+    for start in people:
+        if start in components:
+            continue
+        components[start] = count
+        frontier = [start]
+        while frontier:
+            next_frontier = []
+            for person_id in frontier:
+                for movie_id in people[person_id]["movies"]:
+                    if movie_id in reached:
+                        continue
+                    reached.add(movie_id)
+                    for neighbor_id in movies[movie_id]["stars"]:
+                        if neighbor_id not in components:
+                            components[neighbor_id] = count
+                            next_frontier.append(neighbor_id)
+            frontier = next_frontier
+        count += 1
+    return count
+
+
+def connected(source, target):
+    """
+    Returns False if `source` and `target` are known to be in
+    different components.
+    """
+    if graph is not None:
+        return graph.connected(graph.person_index[source], graph.person_index[target])
+    return components.get(source) is None or components.get(source) == components.get(target)
+
+
+def not_connected():
+    """
+    Returns None, for a search that found no path, after labelling
+    components if they are not labelled yet.
+
+    Labelling takes a search over every person, so it is left until a
+    query turns out to be unreachable rather than done on every load;
+    later queries between components then end immediately.
+    """
+    if not components:
+        label_components()
+    return None
+
+
+def read_table(path, fields, interned, pool=None):
+    """
+    Returns (columns, index) for the CSV at `path`: a column holding
+    each of the named `fields`, interned where flagged in `interned`,
+    and a dictionary mapping each ID, the first field, to its row.
+
+    Chunks are encoded in `pool` if given and joined here, and rows
+    repeating an earlier ID are dropped.
+    """
+    columns = [InternedColumn() if intern else StringColumn() for intern in interned]
+    ids = []
+    for chunk_ids, encoded in ingest.read_columns(path, fields, interned, pool):
+        ids += chunk_ids
+        for column, buffers in zip(columns, encoded):
+            column.extend(*buffers)
+
+    # Map each ID to the first row it appears in
+    index = dict(zip(reversed(ids), range(len(ids) - 1, -1, -1)))
+    if len(index) < len(ids):
+        rows = sorted(index.values())
+        columns = [column.take(rows) for column in columns]
+        index = {ids[row]: i for i, row in enumerate(rows)}
+    return columns, index
+
+
+def load_graph(directory, workers=None):
+    """
+    Load data from CSV files into memory, building the co-star graph
+    and columnar `people`, `movies` and `names` tables over it.
+
+    Each file is parsed in chunks across `workers` processes, which
+    encode the columns and look up the star indices, so that this
+    process only joins their buffers.
+
+    Returns the number of rows of stars.csv that were dropped.
+    """
+    global graph, names, people, movies
+
+    with ingest.process_pool(workers) as pool:
+        person_columns, person_index = read_table(f"{directory}/people.csv", ("id", "name", "birth"),
+                                                  (False, False, True), pool)
+        movie_columns, movie_index = read_table(f"{directory}/movies.csv", ("id", "title", "year"),
+                                                (False, False, True), pool)
+    person_ids, person_names, person_births = person_columns
+    movie_ids, movie_titles, movie_years = movie_columns
+
+    star_people, star_movies, dropped = ingest.read_stars(f"{directory}/stars.csv",
+                                                          person_index, movie_index, workers)
+
+    # Replace the loading dictionaries with binary searches over the IDs
+    person_order = array(INDEX, map(person_index.__getitem__, sorted(person_index)))
+    movie_order = array(INDEX, map(movie_index.__getitem__, sorted(movie_index)))
+    del person_index, movie_index
+    graph = CoStarGraph.from_arrays(person_ids, movie_ids, star_people, star_movies,
+                                    person_index=SortedIndex(person_ids, person_order),
+                                    movie_index=SortedIndex(movie_ids, movie_order))
+    graph.label_components()
+    people, movies, names = tables(graph, person_names, person_births, movie_titles, movie_years)
+    return dropped
+
+
+def load_snapshot(directory):
+    """
+    Load the graph and metadata from a snapshot of `directory`.
+
+    Returns the number of star rows dropped when the snapshot was made,
+    or None if there is no up-to-date snapshot.
+    """
+    global graph, names, people, movies
+
+    data = snapshot.read(directory)
+    if data is None:
+        return None
+    graph, names, people, movies = data.graph, data.names, data.people, data.movies
+    if graph.components is None:
+        graph.label_components()
+    return data.dropped
+
+
+def load_landmarks(directory, count=32):
+    """
+    Load the landmark index for the loaded graph from `directory`,
+    building and saving one with `count` landmarks if there is no
+    up-to-date index.
+    """
+    global landmarks
+
+    if graph is None:
+        raise Exception("landmarks need the co-star graph; load data with csr=True")
+    path = os.path.join(directory, "degrees.landmarks")
+    key = json.dumps({"sources": snapshot.source_key(directory), "count": count}).encode()
+    landmarks = LandmarkIndex.read(path, key)
+    if landmarks is None:
+        landmarks = LandmarkIndex.build(graph, count)
+        landmarks.write(path, key)
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(description="Degrees of separation between two actors.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--csr", action="store_true",
+                        help="search an integer-interned co-star graph")
+    parser.add_argument("--cache", action="store_true",
+                        help="load from (and save) a binary snapshot of the data; implies --csr")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="answer tab-separated source/target name pairs from FILE "
+                             "('-' for stdin) as JSON lines")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of processes for --batch and for parsing with --csr")
+    parser.add_argument("--mode", choices=SEARCH_MODES, default="bidirectional",
+                        help="search algorithm; astar and vectorized imply --csr")
+    parser.add_argument("--estimate", action="store_true",
+                        help="report landmark bounds on the degrees instead of searching; "
+                             "implies --csr")
+    args = parser.parse_args()
+    if args.estimate:
+        args.mode = "estimate"
+    use_landmarks = args.mode in ("astar", "estimate")
 
     # Load data from files into memory
-    print("Loading data...")
-    load_data(directory)
-    print("Data loaded.")
+    print("Loading data...", file=sys.stderr if args.batch else sys.stdout)
+    dropped = load_data(args.directory, csr=args.csr or use_landmarks or args.mode == "vectorized",
+                        cache=args.cache, workers=args.workers)
+    if use_landmarks:
+        load_landmarks(args.directory)
+    print("Data loaded.", file=sys.stderr if args.batch else sys.stdout)
+    if dropped:
+        print(f"Skipped {dropped} rows of stars.csv naming an unknown person or movie.",
+              file=sys.stderr)
+
+    if args.batch:
+        if args.batch == "-":
+            run_batch(sys.stdin, sys.stdout, args.workers, args.mode)
+        else:
+            with open(args.batch, encoding="utf-8") as f:
+                run_batch(f, sys.stdout, args.workers, args.mode)
+        return
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -69,7 +315,16 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = bfs_shortest_path(source, target)
+    if args.mode == "estimate":
+        bounds = estimate_degrees(source, target)
+        if bounds is None:
+            print("Not connected.")
+        else:
+            lower, upper = bounds
+            print(f"Between {lower} and {upper if upper is not None else '?'} degrees of separation.")
+        return
+
+    path = SEARCH_MODES[args.mode](source, target)
 
     if path is None:
         print("Not connected.")
@@ -83,16 +338,88 @@ def main():
             movie = movies[path[i + 1][0]]["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
-def bfs_shortest_path(source, target):
+
+def run_batch(lines, out, workers, mode="bidirectional"):
+    """
+    Answer every tab-separated source/target name pair in `lines`
+    with the search `mode` (or "estimate"), writing one JSON object
+    per pair to `out` in input order.
+
+    Queries are spread across `workers` forked processes, which share
+    the loaded data copy-on-write. The name index and, without the
+    co-star graph, the component labels are built before forking, so
+    that the workers share them instead of each building its own.
+    """
+    pairs = (line.rstrip("\r\n").split("\t") for line in lines if line.strip())
+    query = functools.partial(batch_query, mode=mode)
+    if workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        load_name_index()
+        if graph is None and not components:
+            label_components()
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            for result in pool.imap(query, pairs, chunksize=16):
+                out.write(json.dumps(result) + "\n")
+    else:
+        for result in map(query, pairs):
+            out.write(json.dumps(result) + "\n")
+
+
+def batch_query(pair, mode="bidirectional"):
+    """
+    Returns a JSON-serializable result for one [source, target] name pair.
+    """
+    if len(pair) != 2:
+        return {"input": pair, "error": "expected a source and a target name"}
+    result = {"source": pair[0], "target": pair[1]}
+
+    person_ids = []
+    for name in pair:
+        person_id, candidates = resolve_person(name)
+        if person_id is None:
+            result["error"] = "ambiguous name" if name.lower() in names else "person not found"
+            result["candidates"] = candidates
+            return result
+        person_ids.append(person_id)
+
+    if mode == "estimate":
+        bounds = estimate_degrees(person_ids[0], person_ids[1])
+        result["bounds"] = list(bounds) if bounds is not None else None
+        return result
+
+    path = SEARCH_MODES[mode](person_ids[0], person_ids[1])
+    if path is None:
+        result["degrees"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = path
+    return result
+
+
+def bfs_shortest_path(source, target, bidirectional=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    If `bidirectional` is True, searches from both ends at once
+    (see `bidirectional_shortest_path`).
+
     If no possible path, returns None.
     """
+    search_stats["explored"] = 0
+    if graph is not None:
+        path = graph.shortest_path(graph.person_index[source], graph.person_index[target],
+                                   bidirectional)
+        search_stats["explored"] = graph.explored
+        return graph_path(path)
+
+    if source != target and not connected(source, target):
+        return None
+
+    if bidirectional:
+        return bidirectional_shortest_path(source, target)
 
     # Start with a frontier that contains the initial state
-    frontier = QueueFrontier()
+    frontier = DequeQueueFrontier()
     frontier.add(Node(source, None, None))
 
     # Start with an empty explored set
@@ -103,11 +430,12 @@ def bfs_shortest_path(source, target):
     while True:
         # If the frontier is empty, then so solution
         if frontier.empty():
-            return None
+            return not_connected()
 
         # Remove a node from the frontier
         node = frontier.remove()
         numExplored += 1
+        search_stats["explored"] = numExplored
 
         # If the node contains a goal state, return the solution
         if node.state == target:
@@ -117,7 +445,6 @@ def bfs_shortest_path(source, target):
                 solution.append([node.action,node.state])
                 node = node.parent
             solution.reverse()
-            print(solution)
             return solution
 
         # Add the node that was removed to the explored set
@@ -131,6 +458,188 @@ def bfs_shortest_path(source, target):
                 frontier.add(Node(actor, node, movie))
 
 
+def bidirectional_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth-first
+    from both ends and always expanding the smaller frontier.
+
+    If no possible path, returns None.
+    """
+    if graph is not None:
+        return bfs_shortest_path(source, target, bidirectional=True)
+
+    search_stats["explored"] = 0
+    if source == target:
+        return []
+    if not connected(source, target):
+        return None
+
+    # Maps each reached person to the (movie_id, person_id) step that
+    # leads back towards the side's starting person
+    forward = {source: None}
+    backward = {target: None}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        # Grow the smaller side by one full level
+        if len(forward_frontier) <= len(backward_frontier):
+            frontier, parents, others = forward_frontier, forward, backward
+        else:
+            frontier, parents, others = backward_frontier, backward, forward
+
+        meeting = None
+        next_frontier = []
+        for person_id in frontier:
+            search_stats["explored"] += 1
+            for movie_id, neighbor_id in neighbors_for_person(person_id):
+                if neighbor_id in parents:
+                    continue
+                parents[neighbor_id] = (movie_id, person_id)
+                next_frontier.append(neighbor_id)
+                if neighbor_id in others:
+                    meeting = neighbor_id
+                    break
+            if meeting is not None:
+                break
+
+        if meeting is not None:
+            return join_paths(forward, backward, meeting)
+
+        if frontier is forward_frontier:
+            forward_frontier = next_frontier
+        else:
+            backward_frontier = next_frontier
+
+    return not_connected()
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Returns the list of (movie_id, person_id) pairs from the source to
+    the target of a bidirectional search whose two sides met at `meeting`.
+    """
+    path = []
+    person_id = meeting
+    while forward[person_id] is not None:
+        movie_id, parent_id = forward[person_id]
+        path.append([movie_id, person_id])
+        person_id = parent_id
+    path.reverse()
+
+    person_id = meeting
+    while backward[person_id] is not None:
+        movie_id, child_id = backward[person_id]
+        path.append([movie_id, child_id])
+        person_id = child_id
+    return path
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, without building
+    them all at once.
+    """
+    for path in search_paths(paths.all_shortest_paths, source, target):
+        yield path
+
+
+def k_shortest_paths(source, target, k=None):
+    """
+    Yields up to `k` (or, if None, every) list of (movie_id, person_id)
+    pairs that connect the source to the target without repeating a
+    person, shortest first.
+    """
+    results = search_paths(paths.k_shortest_paths, source, target)
+    for path in itertools.islice(results, k):
+        yield path
+
+
+def search_paths(search, source, target):
+    """
+    Runs a generic path generator from paths.py over the co-star graph
+    if loaded, or `neighbors_for_person` otherwise, and yields its paths
+    as lists of (movie_id, person_id) pairs.
+    """
+    if graph is not None:
+        source, target = graph.person_index[source], graph.person_index[target]
+        if not graph.connected(source, target):
+            return
+        for path in search(source, target, graph.neighbors):
+            yield graph_path(path)
+    else:
+        if source != target and not connected(source, target):
+            return
+        for path in search(source, target, neighbors_for_person):
+            yield [[movie_id, person_id] for movie_id, person_id in path]
+
+
+def astar_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, by A* search over the
+    co-star graph with landmark distance bounds as the heuristic.
+
+    If no possible path, returns None.
+    """
+    if landmarks is None:
+        raise Exception("A* search needs the landmark index; call load_landmarks first")
+    path = landmarks.shortest_path(graph, graph.person_index[source], graph.person_index[target])
+    search_stats["explored"] = graph.explored
+    return graph_path(path)
+
+
+def vectorized_shortest_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, by level-synchronous
+    breadth-first search over NumPy arrays of the co-star graph.
+
+    If no possible path, returns None.
+    """
+    from vectorized import shortest_path
+
+    if graph is None:
+        raise Exception("vectorized search needs the co-star graph; load data with csr=True")
+    path = shortest_path(graph, graph.person_index[source], graph.person_index[target])
+    search_stats["explored"] = graph.explored
+    return graph_path(path)
+
+
+def estimate_degrees(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    the source and the target from the landmark index alone, without
+    searching. `upper` is None when no landmark bounds it.
+
+    If the two are not connected, returns None.
+    """
+    if landmarks is None:
+        raise Exception("estimates need the landmark index; call load_landmarks first")
+    source, target = graph.person_index[source], graph.person_index[target]
+    if not graph.connected(source, target):
+        return None
+    if source == target:
+        return 0, 0
+    bounds = landmarks.bounds(source, target)
+    if bounds is None:
+        return None
+    lower, upper = bounds
+    return max(lower, 1), upper
+
+
+def graph_path(path):
+    """
+    Returns a path of (movie, person) graph indices as a list of
+    (movie_id, person_id) pairs.
+    """
+    if path is None:
+        return None
+    return [[graph.movie_ids[movie], graph.person_ids[person]] for movie, person in path]
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
@@ -138,6 +647,9 @@ def person_id_for_name(name):
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
+        suggestions = [people[person_id]["name"] for person_id, score in find_people(name, 5)]
+        if suggestions:
+            print(f"Did you mean: {', '.join(dict.fromkeys(suggestions))}?")
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
@@ -157,11 +669,62 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def load_name_index():
+    """
+    Returns the index over the keys of `names`, building it on first use.
+    """
+    global name_index
+
+    if name_index is None:
+        name_index = NameIndex(names)
+    return name_index
+
+
+def find_people(name, limit=10, min_score=0.3):
+    """
+    Returns up to `limit` (person_id, score) pairs for the people whose
+    names best match `name`, best first, tolerating partial names and
+    typos. Matches scoring under `min_score` are left out (see
+    `NameIndex.search` for the scores).
+    """
+    matches = []
+    for match, score in load_name_index().search(name, limit):
+        if score < min_score:
+            break
+        matches.extend((person_id, score) for person_id in sorted(names[match]))
+    return matches[:limit]
+
+
+def resolve_person(name, birth=None, limit=10):
+    """
+    Returns (person_id, candidates) for a person's name without prompting.
+
+    `person_id` is the one person whose name matches exactly (ignoring
+    case), and whose birth year is `birth` if given, or else None.
+    `candidates` lists the person_ids it could have meant: every exact
+    match if there are several, otherwise the closest names.
+    """
+    person_ids = sorted(names.get(name.lower(), set()))
+    if birth is not None:
+        person_ids = [person_id for person_id in person_ids if people[person_id]["birth"] == str(birth)]
+    if len(person_ids) == 1:
+        return person_ids[0], person_ids
+    if person_ids:
+        return None, person_ids
+    return None, [person_id for person_id, score in find_people(name, limit)]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return {
+            (graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in graph.neighbors(graph.person_index[person_id])
+        }
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -170,5 +733,14 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+# Search functions selectable from the command line
+SEARCH_MODES = {
+    "bfs": bfs_shortest_path,
+    "bidirectional": bidirectional_shortest_path,
+    "astar": astar_shortest_path,
+    "vectorized": vectorized_shortest_path
+}
+
+
 if __name__ == "__main__":
     main()
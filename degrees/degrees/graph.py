@@ -0,0 +1,269 @@
+from array import array
+
+# Typecodes for the CSR buffers: offsets can exceed 2**31 on very large
+# datasets, indices of people and movies cannot
+OFFSET = "q"
+INDEX = "i"
+
+
+class CoStarGraph():
+    """
+    Bipartite person/movie graph in compressed sparse row form.
+
+    People and movies are interned to dense integers (their position in
+    `person_ids` / `movie_ids`). The movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and the
+    stars of movie `m` are `movie_stars[movie_offsets[m]:movie_offsets[m + 1]]`.
+
+    `person_index` and `movie_index` map IDs back to indices; they are
+    built as dictionaries unless given.
+
+    `components`, once labelled, holds the connected component of each
+    person, so that searches between components end immediately.
+
+    `explored` is the number of people expanded by the last search.
+    """
+
+    def __init__(self, person_ids, movie_ids,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 person_index=None, movie_index=None, components=None):
+        self.person_ids = person_ids
+        self.movie_ids = movie_ids
+        if person_index is None:
+            person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        if movie_index is None:
+            movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        self.person_index = person_index
+        self.movie_index = movie_index
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+        self.components = components
+        self.explored = 0
+
+    @classmethod
+    def build(cls, person_ids, movie_ids, stars, **indexes):
+        """
+        Build a graph from sequences of person and movie IDs and an
+        iterable of (person_index, movie_index) pairs, one per starring
+        role. `indexes` may give `person_index` and `movie_index`.
+        """
+        stars = list(stars)
+        person_offsets, person_movies = compress(len(person_ids), stars, 0)
+        movie_offsets, movie_stars = compress(len(movie_ids), stars, 1)
+        return cls(person_ids, movie_ids,
+                   person_offsets, person_movies, movie_offsets, movie_stars, **indexes)
+
+    @classmethod
+    def from_arrays(cls, person_ids, movie_ids, people, movies, **indexes):
+        """
+        Build a graph like `build` from flat arrays holding the person
+        and movie index of each starring role, sorting them with NumPy
+        if it is installed.
+        """
+        try:
+            from vectorized import compress_arrays
+        except ImportError:
+            return cls.build(person_ids, movie_ids, set(zip(people, movies)), **indexes)
+        buffers = compress_arrays(len(person_ids), len(movie_ids), people, movies)
+        return cls(person_ids, movie_ids, *buffers, **indexes)
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def movies_of(self, person):
+        """
+        Returns the indices of the movies `person` starred in.
+        """
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """
+        Returns the indices of the people who starred in `movie`.
+        """
+        return self.movie_stars[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people who starred
+        with `person`.
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        for k in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[k]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_stars[j]
+
+    def label_components(self):
+        """
+        Label every person with the number of their connected component,
+        in `components`.
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        labels = array(INDEX, [-1]) * len(self.person_ids)
+        seen = bytearray(len(self.movie_ids))
+
+        count = 0
+        for start in range(len(self.person_ids)):
+            if labels[start] != -1:
+                continue
+            labels[start] = count
+            frontier = [start]
+            while frontier:
+                next_frontier = []
+                for person in frontier:
+                    for k in range(person_offsets[person], person_offsets[person + 1]):
+                        movie = person_movies[k]
+                        if seen[movie]:
+                            continue
+                        seen[movie] = 1
+                        for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                            star = movie_stars[j]
+                            if labels[star] == -1:
+                                labels[star] = count
+                                next_frontier.append(star)
+                frontier = next_frontier
+            count += 1
+
+        self.components = labels
+        return count
+
+    def connected(self, source, target):
+        """
+        Returns False if `source` and `target` are known to be in
+        different components.
+        """
+        return self.components is None or self.components[source] == self.components[target]
+
+    def shortest_path(self, source, target, bidirectional=False):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source to the target.
+
+        Each movie's cast is scanned at most once per search side, since
+        every co-star is reached on the level the movie is first seen.
+
+        If no possible path, returns None.
+        """
+        self.explored = 0
+        if source == target:
+            return []
+        if not self.connected(source, target):
+            return None
+        if bidirectional:
+            return self._bidirectional_shortest_path(source, target)
+
+        parent, via, seen = self._search_state(source)
+        frontier = [source]
+        while frontier:
+            next_frontier = []
+            for person, movie, star in self._expand(frontier, parent, via, seen):
+                if star == target:
+                    return trace(parent, via, source, target)
+                next_frontier.append(star)
+            frontier = next_frontier
+        return None
+
+    def _bidirectional_shortest_path(self, source, target):
+        forward = self._search_state(source)
+        backward = self._search_state(target)
+        forward_frontier = [source]
+        backward_frontier = [target]
+
+        while forward_frontier and backward_frontier:
+            # Grow the smaller side by one full level
+            if len(forward_frontier) <= len(backward_frontier):
+                frontier, side, other = forward_frontier, forward, backward
+            else:
+                frontier, side, other = backward_frontier, backward, forward
+
+            next_frontier = []
+            for person, movie, star in self._expand(frontier, *side):
+                if other[0][star] != -1:
+                    path = trace(forward[0], forward[1], source, star)
+                    path.extend(trace(backward[0], backward[1], target, star, forward=False))
+                    return path
+                next_frontier.append(star)
+
+            if side is forward:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+        return None
+
+    def _search_state(self, start):
+        """
+        Returns fresh (parent, via, seen) buffers for a search from `start`.
+        """
+        parent = array(INDEX, [-1]) * len(self.person_ids)
+        via = array(INDEX, [-1]) * len(self.person_ids)
+        seen = bytearray(len(self.movie_ids))
+        parent[start] = start
+        return parent, via, seen
+
+    def _expand(self, frontier, parent, via, seen):
+        """
+        Yields (person, movie, star) for every person first reached from
+        `frontier`, recording how they were reached in `parent` and `via`.
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        for person in frontier:
+            self.explored += 1
+            for k in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[k]
+                if seen[movie]:
+                    continue
+                seen[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if parent[star] != -1:
+                        continue
+                    parent[star] = person
+                    via[star] = movie
+                    yield person, movie, star
+
+
+def compress(n, pairs, key):
+    """
+    Counting-sort (person, movie) `pairs` on element `key` into
+    CSR offsets of length `n + 1` and a targets array.
+    """
+    offsets = array(OFFSET, [0]) * (n + 1)
+    for pair in pairs:
+        offsets[pair[key] + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+
+    targets = array(INDEX, [0]) * len(pairs)
+    cursor = array(OFFSET, offsets[:n])
+    for pair in pairs:
+        row = pair[key]
+        targets[cursor[row]] = pair[1 - key]
+        cursor[row] += 1
+    return offsets, targets
+
+
+def trace(parent, via, start, end, forward=True):
+    """
+    Returns the (movie, person) steps on the chain of `parent` links
+    from `end` back to `start`.
+
+    If `forward`, steps are ordered from `start` to `end` and each names
+    the person arrived at; otherwise they are ordered from `end` to
+    `start` and each names the person arrived at walking towards `start`.
+    """
+    path = []
+    person = end
+    while person != start:
+        if forward:
+            path.append((via[person], person))
+        else:
+            path.append((via[person], parent[person]))
+        person = parent[person]
+    if forward:
+        path.reverse()
+    return path
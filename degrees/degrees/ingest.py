@@ -0,0 +1,179 @@
+import contextlib
+import csv
+import io
+import multiprocessing
+import os
+from array import array
+from itertools import accumulate, compress
+
+from graph import INDEX, OFFSET
+
+# Approximate number of bytes of CSV parsed per task
+CHUNK_SIZE = 1 << 22
+
+# (person_index, movie_index) dictionaries inherited by forked workers
+# while star rows are being read
+indexes = None
+
+
+@contextlib.contextmanager
+def process_pool(workers):
+    """
+    Yields a pool of `workers` forked processes, or None if `workers` is
+    at most 1 or the platform cannot fork.
+    """
+    if workers is not None and workers > 1 and "fork" in multiprocessing.get_all_start_methods():
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            yield pool
+    else:
+        yield None
+
+
+def header(path):
+    """
+    Returns the field names of the CSV at `path` and the byte offset
+    where its first row starts.
+    """
+    with open(path, "rb") as f:
+        line = f.readline()
+    return next(csv.reader([line.decode("utf-8-sig")])), len(line)
+
+
+def chunks(path, start, size=CHUNK_SIZE):
+    """
+    Yields (start, end) byte ranges covering `path` from `start`, each
+    about `size` bytes long and ending at a line boundary.
+
+    Fields with embedded newlines are not supported.
+    """
+    length = os.path.getsize(path)
+    with open(path, "rb") as f:
+        while start < length:
+            f.seek(min(start + size, length))
+            f.readline()
+            end = f.tell()
+            yield start, end
+            start = end
+
+
+def read_chunk(task):
+    """
+    Returns tuples of the fields at the positions `columns` for every
+    row between bytes `start` and `end` of `path`.
+    """
+    path, start, end, columns = task
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    reader = csv.reader(io.StringIO(data.decode("utf-8"), newline=""))
+    return [tuple(row[i] for i in columns) for row in reader if row]
+
+
+def read_rows(path, fields, pool=None):
+    """
+    Yields a tuple of the named `fields` for each row of the CSV at
+    `path`, in file order, parsing chunks of the file in `pool` if given.
+    """
+    names, start = header(path)
+    columns = [names.index(field) for field in fields]
+    tasks = ((path, start, end, columns) for start, end in chunks(path, start))
+    results = pool.imap(read_chunk, tasks) if pool is not None else map(read_chunk, tasks)
+    for rows in results:
+        yield from rows
+
+
+def encode_values(values):
+    """
+    Returns (ends, data) for a sequence of strings: the strings encoded
+    back to back as UTF-8, and the offset at which each one ends.
+    """
+    encoded = [value.encode("utf-8") for value in values]
+    return array(OFFSET, accumulate(map(len, encoded))), b"".join(encoded)
+
+
+def intern_values(values):
+    """
+    Returns (distinct, codes) for a sequence of strings: the distinct
+    strings in order of first appearance, and the position of each
+    string among them.
+    """
+    lookup = {value: code for code, value in enumerate(dict.fromkeys(values))}
+    return list(lookup), array(INDEX, map(lookup.__getitem__, values))
+
+
+def encode_chunk(task):
+    """
+    Returns (ids, columns) for the rows in a chunk: the values of the
+    first field, and each field encoded by `intern_values` if it is
+    flagged in `interned` or else by `encode_values`.
+    """
+    path, start, end, columns, interned = task
+    rows = read_chunk((path, start, end, columns))
+    fields = list(zip(*rows)) if rows else [()] * len(columns)
+    return list(fields[0]), [
+        intern_values(values) if intern else encode_values(values)
+        for values, intern in zip(fields, interned)
+    ]
+
+
+def read_columns(path, fields, interned, pool=None):
+    """
+    Yields the result of `encode_chunk` for each chunk of the CSV at
+    `path`, in file order, encoding the named `fields` in `pool` if
+    given. The first field should be the ID.
+    """
+    names, start = header(path)
+    columns = [names.index(field) for field in fields]
+    tasks = ((path, start, end, columns, interned) for start, end in chunks(path, start))
+    yield from pool.imap(encode_chunk, tasks) if pool is not None else map(encode_chunk, tasks)
+
+
+def index_chunk(task):
+    """
+    Returns (people, movies, dropped) for the star rows in a chunk: flat
+    arrays of the person and movie index of each row, and the number of
+    rows naming a person or movie that is not in `indexes`, which are
+    left out of the arrays.
+    """
+    person_index, movie_index = indexes
+    rows = read_chunk(task)
+    person_ids, movie_ids = zip(*rows) if rows else ((), ())
+    people = list(map(person_index.get, person_ids))
+    movies = list(map(movie_index.get, movie_ids))
+    dropped = 0
+    if None in people or None in movies:
+        known = [person is not None and movie is not None for person, movie in zip(people, movies)]
+        dropped = len(known) - sum(known)
+        people, movies = compress(people, known), compress(movies, known)
+    return array(INDEX, people), array(INDEX, movies), dropped
+
+
+def read_stars(path, person_index, movie_index, workers=None):
+    """
+    Returns (people, movies, dropped) for the stars CSV at `path`: flat
+    arrays of the person and movie index of each starring role, and the
+    number of rows that were dropped for naming an unknown person or
+    movie.
+
+    Chunks are indexed in `workers` forked processes, which inherit the
+    index dictionaries, and their arrays joined in file order.
+    """
+    global indexes
+
+    names, start = header(path)
+    columns = [names.index("person_id"), names.index("movie_id")]
+    tasks = ((path, start, end, columns) for start, end in chunks(path, start))
+
+    people, movies = array(INDEX), array(INDEX)
+    dropped = 0
+    indexes = (person_index, movie_index)
+    try:
+        with process_pool(workers) as pool:
+            results = pool.imap(index_chunk, tasks) if pool is not None else map(index_chunk, tasks)
+            for chunk_people, chunk_movies, count in results:
+                people.extend(chunk_people)
+                movies.extend(chunk_movies)
+                dropped += count
+    finally:
+        indexes = None
+    return people, movies, dropped
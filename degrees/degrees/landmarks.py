@@ -0,0 +1,270 @@
+import heapq
+import mmap
+import os
+import struct
+from array import array
+from itertools import repeat
+
+from graph import INDEX
+
+MAGIC = b"DEGLMK02"
+FILENAME = "degrees.landmarks"
+
+# Distance stored for people a landmark cannot reach
+UNREACHABLE = 255
+
+# Landmarks are chosen from this many best-connected people per landmark
+HUB_POOL = 20
+
+# Number of landmarks the A* heuristic of a query uses, chosen as the
+# ones that bound the distance between its source and target best
+ACTIVE_LANDMARKS = 4
+
+
+class LandmarkIndex():
+    """
+    Breadth-first distances from a few landmark people to everyone in a
+    `CoStarGraph`, for triangle-inequality bounds on degrees of separation.
+
+    `distances[i * n + p]` is the distance from landmark `i` to person `p`,
+    where `n` is the number of people.
+    """
+
+    def __init__(self, landmarks, distances, n):
+        self.landmarks = landmarks
+        self.distances = distances
+        self.n = n
+
+    @classmethod
+    def build(cls, graph, count=32):
+        """
+        Build an index over `graph` with `count` landmarks chosen farthest
+        first from among its best-connected people: the best-connected
+        person, then each time the one furthest from every landmark so
+        far, preferring better-connected people on ties.
+
+        Landmarks spread out this way bound distances in every direction,
+        whereas the very best-connected people tend to sit next to each
+        other and give much the same bounds.
+        """
+        n = len(graph)
+        hubs = heapq.nlargest(HUB_POOL * count, range(n), key=lambda p: degree(graph, p))
+        landmarks = array(INDEX)
+        distances = bytearray()
+        # Distance from each hub to its nearest landmark so far
+        nearest = {hub: UNREACHABLE for hub in hubs}
+
+        def spread(hub):
+            # Hubs no landmark reaches come after all the others, so that
+            # landmarks are not spent on small components, and landmarks
+            # themselves come last of all
+            d = nearest[hub]
+            return -1 if d == 0 else 0 if d == UNREACHABLE else d
+
+        for i in range(min(count, len(hubs))):
+            landmark = hubs[0] if i == 0 else max(hubs, key=spread)
+            if spread(landmark) < 0:
+                break
+            row = distances_from(graph, landmark)
+            landmarks.append(landmark)
+            distances += row
+            for hub in hubs:
+                nearest[hub] = min(nearest[hub], row[hub])
+        return cls(landmarks, distances, n)
+
+    @classmethod
+    def read(cls, path, key):
+        """
+        Memory-map an index written by `write`.
+
+        Returns None if there is no index at `path` or it was not written
+        for `key`.
+        """
+        try:
+            with open(path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    return None
+                length, count, n = struct.unpack("<QQQ", f.read(24))
+                if f.read(length) != key:
+                    return None
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, struct.error):
+            return None
+
+        start = len(MAGIC) + 24 + length
+        view = memoryview(buffer)
+        landmarks = view[start:start + count * 4].cast(INDEX)
+        distances = view[start + count * 4:start + count * 4 + count * n]
+        return cls(landmarks, distances, n)
+
+    def write(self, path, key):
+        """
+        Write the index to `path`, tagged with the bytes `key`.
+
+        Returns False if the index could not be written.
+        """
+        try:
+            with open(f"{path}.tmp", "wb") as f:
+                f.write(MAGIC)
+                f.write(struct.pack("<QQQ", len(key), len(self.landmarks), self.n))
+                f.write(key)
+                f.write(array(INDEX, self.landmarks))
+                f.write(self.distances)
+            os.replace(f"{path}.tmp", path)
+        except OSError:
+            return False
+        return True
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the distance between two people,
+        or None if some landmark reaches only one of them. `upper` is None
+        if no landmark reaches either.
+        """
+        n, distances = self.n, self.distances
+        lower, upper = 0, UNREACHABLE
+        for i in range(len(self.landmarks)):
+            a, b = distances[i * n + source], distances[i * n + target]
+            if a == UNREACHABLE and b == UNREACHABLE:
+                continue
+            if a == UNREACHABLE or b == UNREACHABLE:
+                return None
+            lower = max(lower, abs(a - b))
+            upper = min(upper, a + b)
+        return lower, (upper if upper != UNREACHABLE else None)
+
+    def heuristic(self, source, target):
+        """
+        Returns a function giving admissible, consistent lower bounds on
+        the distances from people to `target`, from the
+        `ACTIVE_LANDMARKS` landmarks that bound the distance from `source`
+        best. Each landmark's bound is consistent, so so is their maximum.
+
+        The bound of each landmark is looked up in a copy of its row of
+        distances translated to the difference from the target's. The
+        function takes a sequence of people and returns an iterator over
+        their bounds, raised to at least `floor`, which runs in C.
+        """
+        n, distances = self.n, self.distances
+        rows = [
+            i * n for i in range(len(self.landmarks))
+            if distances[i * n + target] != UNREACHABLE and distances[i * n + source] != UNREACHABLE
+        ]
+        rows = heapq.nlargest(ACTIVE_LANDMARKS, rows,
+                              key=lambda row: abs(distances[row + source] - distances[row + target]))
+        bounds = []
+        for row in rows:
+            d = distances[row + target]
+            table = bytes(abs(v - d) if v != UNREACHABLE else 0 for v in range(256))
+            bounds.append(bytes(distances[row:row + n]).translate(table))
+
+        def h(people, floor=0):
+            # The two constant columns keep max() given at least two
+            # arguments however few landmarks there are
+            return map(max, *(map(bound.__getitem__, people) for bound in bounds),
+                       repeat(floor), repeat(floor))
+        return h
+
+    def shortest_path(self, graph, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs that
+        connect the source to the target, by A* search guided by the
+        landmark lower bounds. Sets `graph.explored` to the number of
+        people expanded.
+
+        Every step costs 1, and no one but the target is less than 1 away
+        from it, so a bound of at least 1 is kept for everyone else. The
+        person being expanded then has the lowest estimate of any path,
+        and reaching the target from them is a shortest path, so the
+        search ends when the target is first reached rather than expanded.
+        As in `CoStarGraph.shortest_path`, a movie's cast is only scanned
+        again when it is reached at a lower cost than before, and people
+        whose estimate is longer than the landmarks' upper bound on the
+        distance are never added to the frontier.
+
+        If no possible path, returns None.
+        """
+        graph.explored = 0
+        if source == target:
+            return []
+        if not graph.connected(source, target):
+            return None
+        h = self.heuristic(source, target)
+        bounds = self.bounds(source, target)
+        longest = bounds[1] if bounds is not None and bounds[1] is not None else UNREACHABLE
+
+        # Heap of (estimated total length, -cost, person), preferring
+        # people further along among equal estimates
+        frontier = [(next(h((source,), 1)), 0, source)]
+        cost = {source: 0}
+        parent = {source: None}
+        scanned = {}
+        expanded = set()
+        while frontier:
+            _, _, person = heapq.heappop(frontier)
+            if person in expanded:
+                continue
+            expanded.add(person)
+            graph.explored += 1
+
+            reached = cost[person] + 1
+            for movie in graph.movies_of(person):
+                if scanned.get(movie, UNREACHABLE) <= reached:
+                    continue
+                scanned[movie] = reached
+                stars = graph.stars_of(movie)
+                for star, bound in zip(stars, h(stars, 1)):
+                    if star == target:
+                        path = [(movie, star)]
+                        while parent[person] is not None:
+                            path.append((parent[person][0], person))
+                            person = parent[person][1]
+                        path.reverse()
+                        return path
+                    if reached + bound <= longest and reached < cost.get(star, UNREACHABLE):
+                        cost[star] = reached
+                        parent[star] = (movie, person)
+                        heapq.heappush(frontier, (reached + bound, -reached, star))
+        return None
+
+
+def degree(graph, person):
+    """
+    Returns the number of starring roles alongside `person`, counting
+    co-stars once per shared movie.
+    """
+    return sum(
+        graph.movie_offsets[movie + 1] - graph.movie_offsets[movie]
+        for movie in graph.movies_of(person)
+    )
+
+
+def distances_from(graph, landmark):
+    """
+    Returns a bytearray of the breadth-first distance from `landmark`
+    to every person, capped at UNREACHABLE.
+    """
+    person_offsets, person_movies = graph.person_offsets, graph.person_movies
+    movie_offsets, movie_stars = graph.movie_offsets, graph.movie_stars
+    distances = bytearray([UNREACHABLE]) * len(graph)
+    seen = bytearray(len(graph.movie_ids))
+    distances[landmark] = 0
+
+    frontier = [landmark]
+    depth = 0
+    while frontier and depth + 1 < UNREACHABLE:
+        depth += 1
+        next_frontier = []
+        for person in frontier:
+            for k in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[k]
+                if seen[movie]:
+                    continue
+                seen[movie] = 1
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    star = movie_stars[j]
+                    if distances[star] == UNREACHABLE:
+                        distances[star] = depth
+                        next_frontier.append(star)
+        frontier = next_frontier
+    return distances
@@ -0,0 +1,70 @@
+import heapq
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+
+class NameIndex():
+    """
+    Index of lower-cased names for prefix and typo-tolerant lookup.
+
+    Names are kept sorted, so every name with a given prefix is one
+    contiguous run found by binary search, and each name's character
+    trigrams map to the positions of the names that contain them.
+    """
+
+    def __init__(self, names):
+        self.names = sorted(set(names))
+        self.sizes = array("H")
+        self.grams = {}
+        for i, name in enumerate(self.names):
+            grams = trigrams(name)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                if gram not in self.grams:
+                    self.grams[gram] = array("i")
+                self.grams[gram].append(i)
+
+    def with_prefix(self, prefix, limit):
+        """
+        Returns up to `limit` names starting with `prefix`, in order.
+        """
+        start = bisect_left(self.names, prefix)
+        result = []
+        for name in self.names[start:start + limit]:
+            if not name.startswith(prefix):
+                break
+            result.append(name)
+        return result
+
+    def search(self, query, limit=10):
+        """
+        Returns up to `limit` (name, score) pairs for the names closest to
+        `query`, best first.
+
+        An exact match scores 2, names starting with the query score
+        between 1 and 2, and other names score their trigram similarity
+        (the Dice coefficient) to the query, between 0 and 1.
+        """
+        query = query.lower().strip()
+        grams = trigrams(query)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.grams.get(gram, ()))
+
+        def similarity(i):
+            return 2 * shared[i] / (len(grams) + self.sizes[i])
+
+        scores = {self.names[i]: similarity(i) for i in heapq.nlargest(limit, shared, key=similarity)}
+        for name in self.with_prefix(query, limit):
+            scores[name] = 2 if name == query else 1 + len(query) / len(name)
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+
+
+def trigrams(name):
+    """
+    Returns the set of character trigrams of `name`, padded so that the
+    start and end of each word count.
+    """
+    padded = f"  {' '.join(name.split())} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
@@ -0,0 +1,122 @@
+import heapq
+import itertools
+
+
+def bfs_path(source, target, neighbors, banned_nodes=(), banned_edges=()):
+    """
+    Returns the shortest list of (movie, person) pairs that connect the
+    source to the target, where `neighbors(person)` yields the (movie,
+    person) pairs for a person's co-stars.
+
+    People in `banned_nodes` and (person, movie, person) steps in
+    `banned_edges` are never used.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+    parents = {source: None}
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for person in frontier:
+            for movie, neighbor in neighbors(person):
+                if neighbor in parents or neighbor in banned_nodes:
+                    continue
+                if (person, movie, neighbor) in banned_edges:
+                    continue
+                parents[neighbor] = (movie, person)
+                if neighbor == target:
+                    path = []
+                    while parents[neighbor] is not None:
+                        movie, parent = parents[neighbor]
+                        path.append((movie, neighbor))
+                        neighbor = parent
+                    path.reverse()
+                    return path
+                next_frontier.append(neighbor)
+        frontier = next_frontier
+    return None
+
+
+def depths(source, target, neighbors):
+    """
+    Returns a dictionary of the breadth-first depth of every person up to
+    the depth of the target, which together with `neighbors` forms the
+    DAG of all shortest paths from the source. The target is missing if
+    it cannot be reached.
+    """
+    depth = {source: 0}
+    frontier = [source]
+    while frontier and target not in depth:
+        next_frontier = []
+        for person in frontier:
+            for movie, neighbor in neighbors(person):
+                if neighbor not in depth:
+                    depth[neighbor] = depth[person] + 1
+                    next_frontier.append(neighbor)
+        frontier = next_frontier
+    return depth
+
+
+def all_shortest_paths(source, target, neighbors):
+    """
+    Yields every shortest list of (movie, person) pairs that connect the
+    source to the target, one at a time.
+
+    A single breadth-first sweep labels depths; paths are then walked
+    back from the target along steps that go down one depth, so only
+    the path being built is held in memory.
+    """
+    depth = depths(source, target, neighbors)
+    if target not in depth:
+        return
+
+    stack = [(target, ())]
+    while stack:
+        person, suffix = stack.pop()
+        if person == source:
+            yield list(suffix)
+            continue
+        for movie, neighbor in sorted(neighbors(person), reverse=True):
+            if depth.get(neighbor) == depth[person] - 1:
+                stack.append((neighbor, ((movie, person),) + suffix))
+
+
+def k_shortest_paths(source, target, neighbors):
+    """
+    Yields simple lists of (movie, person) pairs that connect the source
+    to the target, shortest first, using Yen's algorithm: each new path
+    follows a previous one up to some person, then detours along the
+    shortest route that avoids every step already taken from there.
+    """
+    path = bfs_path(source, target, neighbors)
+    if path is None:
+        return
+
+    found = []
+    candidates = []
+    seen = {tuple(path)}
+    counter = itertools.count()
+    while True:
+        yield path
+        found.append(path)
+
+        people = [source] + [person for movie, person in path]
+        for i in range(len(path)):
+            root = path[:i]
+            banned_edges = {
+                (people[i],) + other[i] for other in found
+                if len(other) > i and other[:i] == root
+            }
+            spur = bfs_path(people[i], target, neighbors, set(people[:i]), banned_edges)
+            if spur is None:
+                continue
+            candidate = root + spur
+            if tuple(candidate) not in seen:
+                seen.add(tuple(candidate))
+                heapq.heappush(candidates, (len(candidate), next(counter), candidate))
+
+        if not candidates:
+            return
+        path = heapq.heappop(candidates)[2]
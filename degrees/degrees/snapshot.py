@@ -0,0 +1,141 @@
+import json
+import mmap
+import os
+import struct
+
+from graph import CoStarGraph
+from store import InternedColumn, SortedIndex, StringColumn, tables
+
+MAGIC = b"DEGSNAP2"
+FILENAME = "degrees.snapshot"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# Sections are aligned so every array can be cast in place
+ALIGNMENT = 8
+
+
+def source_key(directory):
+    """
+    Returns the size and modification time of each source CSV, which a
+    snapshot must match to be used.
+    """
+    key = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        key[filename] = [stat.st_size, stat.st_mtime_ns]
+    return key
+
+
+def write(directory, graph, people, movies, names, dropped=0):
+    """
+    Write `graph` and the `people`/`movies`/`names` tables over it to a
+    snapshot file in `directory`, keyed on the current source CSVs.
+    `dropped` is the number of star rows skipped while parsing them.
+
+    Returns False if the snapshot could not be written.
+    """
+    sections = {}
+    sections.update(graph.person_ids.buffers("person_ids"))
+    sections.update(graph.movie_ids.buffers("movie_ids"))
+    sections.update(people.columns["name"].buffers("person_names"))
+    sections.update(people.columns["birth"].buffers("person_births"))
+    sections.update(movies.columns["title"].buffers("movie_titles"))
+    sections.update(movies.columns["year"].buffers("movie_years"))
+    sections["person_order"] = graph.person_index.order
+    sections["movie_order"] = graph.movie_index.order
+    sections["name_order"] = names.index.order
+    sections["person_offsets"] = graph.person_offsets
+    sections["person_movies"] = graph.person_movies
+    sections["movie_offsets"] = graph.movie_offsets
+    sections["movie_stars"] = graph.movie_stars
+    if graph.components is not None:
+        sections["person_components"] = graph.components
+
+    # Lay out sections after the header, each on an aligned offset
+    layout = {}
+    position = 0
+    for name, section in sections.items():
+        data = memoryview(section)
+        layout[name] = [data.format, position, data.nbytes]
+        position = align(position + data.nbytes)
+
+    header = json.dumps({"key": source_key(directory), "sections": layout, "dropped": dropped}).encode()
+    start = align(len(MAGIC) + 8 + len(header))
+
+    path = os.path.join(directory, FILENAME)
+    try:
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            for name, section in sections.items():
+                f.write(b"\0" * (start + layout[name][1] - f.tell()))
+                f.write(section)
+        os.replace(f"{path}.tmp", path)
+    except OSError:
+        return False
+    return True
+
+
+def read(directory):
+    """
+    Memory-map the snapshot in `directory`.
+
+    Returns None if there is no snapshot or it does not match the
+    current source CSVs.
+    """
+    path = os.path.join(directory, FILENAME)
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(length))
+            if header["key"] != source_key(directory):
+                return None
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, KeyError, struct.error):
+        return None
+
+    start = align(len(MAGIC) + 8 + length)
+    view = memoryview(buffer)
+    sections = {
+        name: view[start + offset:start + offset + size].cast(typecode)
+        for name, (typecode, offset, size) in header["sections"].items()
+    }
+    return Snapshot(sections, header.get("dropped", 0))
+
+
+class Snapshot():
+    """
+    Graph and metadata read from a memory-mapped snapshot.
+
+    `people`, `movies` and `names` are the read-only tables from
+    `store.tables`, with every column backed by the map. `dropped` is
+    the number of star rows skipped when the snapshot was made.
+    """
+
+    def __init__(self, sections, dropped=0):
+        self.dropped = dropped
+        person_ids = StringColumn.from_buffers(sections, "person_ids")
+        movie_ids = StringColumn.from_buffers(sections, "movie_ids")
+        self.graph = CoStarGraph(
+            person_ids, movie_ids,
+            sections["person_offsets"], sections["person_movies"],
+            sections["movie_offsets"], sections["movie_stars"],
+            person_index=SortedIndex(person_ids, sections["person_order"]),
+            movie_index=SortedIndex(movie_ids, sections["movie_order"]),
+            components=sections.get("person_components")
+        )
+        self.people, self.movies, self.names = tables(
+            self.graph,
+            StringColumn.from_buffers(sections, "person_names"),
+            InternedColumn.from_buffers(sections, "person_births"),
+            StringColumn.from_buffers(sections, "movie_titles"),
+            InternedColumn.from_buffers(sections, "movie_years"),
+            sections["name_order"]
+        )
+
+
+def align(position):
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
@@ -0,0 +1,294 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+
+from graph import INDEX, OFFSET
+
+
+class StringColumn():
+    """
+    Column of strings stored back to back as UTF-8, with an offsets array.
+    """
+
+    def __init__(self, offsets=None, data=None):
+        self.offsets = offsets if offsets is not None else array(OFFSET, [0])
+        self.data = data if data is not None else bytearray()
+
+    @classmethod
+    def from_buffers(cls, buffers, name):
+        return cls(buffers[f"{name}.offsets"], buffers[f"{name}.data"])
+
+    def buffers(self, name):
+        """
+        Returns the column's buffers, keyed by names derived from `name`.
+        """
+        return {f"{name}.offsets": self.offsets, f"{name}.data": self.data}
+
+    def append(self, value):
+        """
+        Append `value` and return its row.
+        """
+        self.data += value.encode("utf-8")
+        self.offsets.append(len(self.data))
+        return len(self) - 1
+
+    def extend(self, ends, data):
+        """
+        Append the values encoded back to back in `data`, where `ends`
+        gives the offset in `data` at which each value ends.
+        """
+        self.offsets.extend(map(len(self.data).__add__, ends))
+        self.data += data
+
+    def take(self, rows):
+        """
+        Returns a new column of the values at `rows`, in that order.
+        """
+        column = StringColumn()
+        for i in rows:
+            column.data += self.data[self.offsets[i]:self.offsets[i + 1]]
+            column.offsets.append(len(column.data))
+        return column
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class InternedColumn():
+    """
+    Column of strings stored as codes into a column of distinct values,
+    for fields such as years that repeat across many rows.
+    """
+
+    def __init__(self, values=None, codes=None):
+        self.values = values if values is not None else StringColumn()
+        self.codes = codes if codes is not None else array(INDEX)
+        self.lookup = None
+
+    @classmethod
+    def from_buffers(cls, buffers, name):
+        return cls(StringColumn.from_buffers(buffers, f"{name}.values"), buffers[f"{name}.codes"])
+
+    def buffers(self, name):
+        """
+        Returns the column's buffers, keyed by names derived from `name`.
+        """
+        buffers = self.values.buffers(f"{name}.values")
+        buffers[f"{name}.codes"] = self.codes
+        return buffers
+
+    def append(self, value):
+        """
+        Append `value` and return its row.
+        """
+        if self.lookup is None:
+            self.lookup = {value: code for code, value in enumerate(self.values)}
+        code = self.lookup.get(value)
+        if code is None:
+            code = self.lookup[value] = self.values.append(value)
+        self.codes.append(code)
+        return len(self.codes) - 1
+
+    def extend(self, values, codes):
+        """
+        Append the values given by `codes` into the sequence of distinct
+        `values`.
+        """
+        if self.lookup is None:
+            self.lookup = {value: code for code, value in enumerate(self.values)}
+        remap = array(INDEX)
+        for value in values:
+            code = self.lookup.get(value)
+            if code is None:
+                code = self.lookup[value] = self.values.append(value)
+            remap.append(code)
+        self.codes.extend(map(remap.__getitem__, codes))
+
+    def take(self, rows):
+        """
+        Returns a new column of the values at `rows`, in that order,
+        sharing this column's distinct values.
+        """
+        return InternedColumn(self.values, array(INDEX, map(self.codes.__getitem__, rows)))
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, i):
+        return self.values[self.codes[i]]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class LinkColumn():
+    """
+    Read-only column giving, for each person (or movie) in a
+    `CoStarGraph`, the set of IDs of their movies (or stars).
+    """
+
+    def __init__(self, graph, people):
+        self.graph = graph
+        self.people = people
+
+    def __getitem__(self, i):
+        if self.people:
+            return {self.graph.movie_ids[movie] for movie in self.graph.movies_of(i)}
+        return {self.graph.person_ids[person] for person in self.graph.stars_of(i)}
+
+
+class SortedIndex():
+    """
+    Maps values of a sequence back to their positions, by binary search
+    over a permutation that sorts the sequence.
+    """
+
+    def __init__(self, values, order=None):
+        self.values = values
+        self.order = order if order is not None else sorted_order(values)
+
+    def positions(self, value):
+        """
+        Returns the positions of every element equal to `value`.
+        """
+        low = bisect_left(self.order, value, key=self.values.__getitem__)
+        high = bisect_right(self.order, value, lo=low, key=self.values.__getitem__)
+        return self.order[low:high]
+
+    def __getitem__(self, value):
+        positions = self.positions(value)
+        if not positions:
+            raise KeyError(value)
+        return positions[0]
+
+    def __contains__(self, value):
+        return len(self.positions(value)) > 0
+
+    def get(self, value, default=None):
+        positions = self.positions(value)
+        return positions[0] if positions else default
+
+
+class Table(Mapping):
+    """
+    Maps IDs to records whose fields are stored column by column.
+
+    `index` maps each ID to its row, and `columns` maps each field name
+    to a sequence holding that field for every row.
+    """
+
+    def __init__(self, ids, index, columns):
+        self.ids = ids
+        self.index = index
+        self.columns = columns
+
+    def __getitem__(self, key):
+        return Record(self, self.index[key])
+
+    def __iter__(self):
+        return iter(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+
+class Record():
+    """
+    View of one row of a `Table`, read like a dictionary of its fields.
+    """
+
+    __slots__ = ("table", "row")
+
+    def __init__(self, table, row):
+        self.table = table
+        self.row = row
+
+    def __getitem__(self, field):
+        return self.table.columns[field][self.row]
+
+    def get(self, field, default=None):
+        if field not in self.table.columns:
+            return default
+        return self[field]
+
+    def keys(self):
+        return self.table.columns.keys()
+
+    def __repr__(self):
+        return repr({field: self[field] for field in self.keys()})
+
+
+class Names(Mapping):
+    """
+    Maps lower-cased names to the set of person IDs with that name.
+    """
+
+    def __init__(self, person_ids, person_names, order=None):
+        self.person_ids = person_ids
+        self.index = SortedIndex(LowerCase(person_names), order)
+
+    def __getitem__(self, name):
+        positions = self.index.positions(name)
+        if not positions:
+            raise KeyError(name)
+        return {self.person_ids[i] for i in positions}
+
+    def __iter__(self):
+        previous = None
+        for i in self.index.order:
+            name = self.index.values[i]
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for name in self)
+
+
+class LowerCase():
+    """
+    Lower-cased view of a sequence of strings.
+    """
+
+    def __init__(self, values):
+        self.values = values
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, i):
+        return self.values[i].lower()
+
+
+def tables(graph, person_names, person_births, movie_titles, movie_years, name_order=None):
+    """
+    Returns (people, movies, names) mappings over the metadata columns
+    and the co-star graph, shaped like the dictionaries in degrees.py.
+    """
+    people = Table(graph.person_ids, graph.person_index, {
+        "name": person_names,
+        "birth": person_births,
+        "movies": LinkColumn(graph, True)
+    })
+    movies = Table(graph.movie_ids, graph.movie_index, {
+        "title": movie_titles,
+        "year": movie_years,
+        "stars": LinkColumn(graph, False)
+    })
+    names = Names(graph.person_ids, person_names, name_order)
+    return people, movies, names
+
+
+def sorted_order(values):
+    """
+    Returns an index array of the positions of `values` in sorted order.
+    """
+    return array(INDEX, sorted(range(len(values)), key=values.__getitem__))
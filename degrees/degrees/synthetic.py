@@ -0,0 +1,102 @@
+import argparse
+import csv
+import os
+import random
+
+FIRST_NAMES = [
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda",
+    "William", "Elizabeth", "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica",
+    "Thomas", "Sarah", "Charles", "Karen", "Daniel", "Nancy", "Matthew", "Lisa",
+    "Anthony", "Betty", "Mark", "Margaret", "Paul", "Sandra", "Steven", "Ashley",
+    "Kevin", "Emma", "Tom", "Cary", "Robin", "Sally", "Gary", "Demi"
+]
+
+LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+    "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson",
+    "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Perez", "Thompson",
+    "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson", "Walker",
+    "Young", "Allen", "King", "Wright", "Scott", "Torres", "Nguyen", "Hill", "Flores"
+]
+
+
+def generate(directory, n_people, n_movies=None, cast_exponent=2.0, popularity=3.0,
+             max_cast=200, seed=None):
+    """
+    Write people.csv, movies.csv and stars.csv for a synthetic dataset
+    with `n_people` people and `n_movies` movies (a third as many as
+    people by default) to `directory`.
+
+    Cast sizes follow a Pareto (power-law) distribution with exponent
+    `cast_exponent`, capped at `max_cast`. Each role is filled by a
+    person drawn with a skew of `popularity`, so that a few people star
+    in many movies and most in only a few. Anyone left without a role
+    is then cast in one movie chosen at random, so that every person
+    has at least one. Names are drawn from a small pool, so many are
+    shared by several people.
+
+    Rows are written as they are generated, and only a byte per person
+    is kept to know who has been cast.
+    """
+    rng = random.Random(seed)
+    if n_movies is None:
+        n_movies = max(1, n_people // 3)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for i in range(n_people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            if rng.random() < 0.5:
+                name = f"{name} {rng.choice(LAST_NAMES)}"
+            birth = str(rng.randint(1900, 2005)) if rng.random() < 0.8 else ""
+            writer.writerow([person_id(i), name, birth])
+
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for i in range(n_movies):
+            writer.writerow([movie_id(i), f"Movie {i + 1}", str(rng.randint(1920, 2024))])
+
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        has_role = bytearray(n_people)
+        for i in range(n_movies):
+            cast_size = min(max_cast, int(rng.paretovariate(cast_exponent - 1)))
+            cast = {int(n_people * rng.random() ** popularity) for _ in range(cast_size)}
+            for person in sorted(cast):
+                has_role[person] = 1
+                writer.writerow([person_id(person), movie_id(i)])
+        for person in range(n_people):
+            if not has_role[person]:
+                writer.writerow([person_id(person), movie_id(rng.randrange(n_movies))])
+
+
+def person_id(i):
+    return str(100 + 7 * i)
+
+
+def movie_id(i):
+    return str(10000 + 3 * i)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic degrees dataset.")
+    parser.add_argument("directory")
+    parser.add_argument("--people", type=int, default=10000)
+    parser.add_argument("--movies", type=int, default=None)
+    parser.add_argument("--cast-exponent", type=float, default=2.0,
+                        help="power-law exponent of the cast size distribution")
+    parser.add_argument("--popularity", type=float, default=3.0,
+                        help="skew of how often the same people are cast")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    generate(args.directory, args.people, args.movies, args.cast_exponent, args.popularity,
+             seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
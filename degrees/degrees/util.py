@@ -1,8 +1,14 @@
+import heapq
+import itertools
+from collections import deque
+
+
 class Node():
-    def __init__(self, state, parent, action):
+    def __init__(self, state, parent, action, cost=0):
         self.state = state
         self.parent = parent
         self.action = action
+        self.cost = cost
 
 
 class StackFrontier():
@@ -36,3 +42,75 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class DequeStackFrontier():
+    """
+    Stack frontier backed by a deque, with a hashed index of the states
+    currently in the frontier so that every operation is O(1).
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        # Maps each state to the number of nodes holding it in the frontier
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        node = self._pop()
+        self._forget(node.state)
+        return node
+
+    def _pop(self):
+        return self.frontier.pop()
+
+    def _forget(self, state):
+        count = self.states[state] - 1
+        if count:
+            self.states[state] = count
+        else:
+            del self.states[state]
+
+
+class DequeQueueFrontier(DequeStackFrontier):
+    """
+    Queue frontier backed by a deque, with a hashed index of the states
+    currently in the frontier so that every operation is O(1).
+    """
+
+    def _pop(self):
+        return self.frontier.popleft()
+
+
+class PriorityFrontier(DequeStackFrontier):
+    """
+    Frontier that always removes the node with the lowest priority,
+    for uniform-cost and heuristic search.
+
+    `priority` is a function of a node; by default it is the node's cost.
+    Nodes with equal priority are removed in the order they were added.
+    """
+
+    def __init__(self, priority=None):
+        super().__init__()
+        self.frontier = []
+        self.priority = priority if priority is not None else (lambda node: node.cost)
+        self.counter = itertools.count()
+
+    def add(self, node):
+        heapq.heappush(self.frontier, (self.priority(node), next(self.counter), node))
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def _pop(self):
+        return heapq.heappop(self.frontier)[2]
@@ -0,0 +1,133 @@
+from array import array
+
+import numpy as np
+
+from graph import INDEX, OFFSET, trace
+
+# Expand bottom-up once scanning the casts of the movies reached on a
+# level costs more than this many times scanning the filmographies of
+# everyone not yet reached
+BOTTOM_UP_RATIO = 1
+
+
+def arrays(graph):
+    """
+    Returns zero-copy NumPy views of the CSR buffers of `graph`.
+    """
+    return (
+        np.frombuffer(graph.person_offsets, dtype=np.int64),
+        np.frombuffer(graph.person_movies, dtype=np.int32),
+        np.frombuffer(graph.movie_offsets, dtype=np.int64),
+        np.frombuffer(graph.movie_stars, dtype=np.int32)
+    )
+
+
+def buffer(typecode, values):
+    """
+    Returns a copy of the NumPy array `values` as an `array` of
+    `typecode`.
+    """
+    result = array(typecode)
+    result.frombytes(values.astype(np.dtype(typecode)).tobytes())
+    return result
+
+
+def compress_arrays(n_people, n_movies, people, movies):
+    """
+    Returns the (person_offsets, person_movies, movie_offsets,
+    movie_stars) buffers of a `CoStarGraph` from flat arrays of the
+    person and movie index of each starring role, dropping repeated
+    roles.
+    """
+    # Sorting each role by person and then movie also drops repeats
+    roles = np.unique(np.frombuffer(people, dtype=np.int32).astype(np.int64) * n_movies
+                      + np.frombuffer(movies, dtype=np.int32))
+    people, movies = roles // n_movies, roles % n_movies
+    by_movie = np.argsort(movies, kind="stable")
+
+    person_offsets = np.zeros(n_people + 1, dtype=np.int64)
+    np.cumsum(np.bincount(people, minlength=n_people), out=person_offsets[1:])
+    movie_offsets = np.zeros(n_movies + 1, dtype=np.int64)
+    np.cumsum(np.bincount(movies, minlength=n_movies), out=movie_offsets[1:])
+    return (buffer(OFFSET, person_offsets), buffer(INDEX, movies),
+            buffer(OFFSET, movie_offsets), buffer(INDEX, people[by_movie]))
+
+
+def gather(offsets, targets, rows):
+    """
+    Returns (owners, values): the concatenated CSR rows `rows` of
+    `targets`, and for each value the position in `rows` it came from.
+    """
+    starts = offsets[rows]
+    lengths = offsets[rows + 1] - starts
+    owners = np.repeat(np.arange(len(rows)), lengths)
+    ends = np.cumsum(lengths)
+    positions = np.arange(ends[-1] if len(ends) else 0) - np.repeat(ends - lengths - starts, lengths)
+    return owners, targets[positions]
+
+
+def shortest_path(graph, source, target):
+    """
+    Returns the shortest list of (movie, person) index pairs that
+    connect the source to the target.
+
+    Expands a whole level at a time with array operations. Each level
+    first reaches the unseen movies of the frontier, then the people in
+    those movies. The second half runs top-down, gathering the casts of
+    the new movies, or bottom-up, checking every unreached person's
+    movies, whichever scans fewer entries.
+
+    Sets `graph.explored` to the number of people expanded.
+
+    If no possible path, returns None.
+    """
+    graph.explored = 0
+    if source == target:
+        return []
+    if not graph.connected(source, target):
+        return None
+
+    person_offsets, person_movies, movie_offsets, movie_stars = arrays(graph)
+    person_degree = np.diff(person_offsets)
+    movie_degree = np.diff(movie_offsets)
+
+    parent = np.full(len(graph), -1, dtype=np.int32)
+    via = np.full(len(graph), -1, dtype=np.int32)
+    movie_parent = np.full(len(graph.movie_ids), -1, dtype=np.int32)
+    parent[source] = source
+    unreached_scan = int(person_degree.sum() - person_degree[source])
+
+    frontier = np.array([source], dtype=np.int32)
+    while len(frontier) and parent[target] == -1:
+        graph.explored += len(frontier)
+
+        # Reach the movies of the frontier not yet seen, remembering the
+        # first frontier person to reach each
+        owners, reached = gather(person_offsets, person_movies, frontier)
+        new = movie_parent[reached] == -1
+        new_movies, first = np.unique(reached[new], return_index=True)
+        movie_parent[new_movies] = frontier[owners[new][first]]
+
+        # Reach the people in those movies
+        if movie_degree[new_movies].sum() > BOTTOM_UP_RATIO * unreached_scan:
+            level = np.zeros(len(graph.movie_ids), dtype=bool)
+            level[new_movies] = True
+            unreached = np.flatnonzero(parent == -1).astype(np.int32)
+            owners, movies = gather(person_offsets, person_movies, unreached)
+            hits = level[movies]
+            people, first = np.unique(owners[hits], return_index=True)
+            frontier = unreached[people]
+            via[frontier] = movies[hits][first]
+        else:
+            owners, stars = gather(movie_offsets, movie_stars, new_movies)
+            new = parent[stars] == -1
+            frontier, first = np.unique(stars[new], return_index=True)
+            frontier = frontier.astype(np.int32)
+            via[frontier] = new_movies[owners[new][first]]
+
+        parent[frontier] = movie_parent[via[frontier]]
+        unreached_scan -= int(person_degree[frontier].sum())
+
+    if parent[target] == -1:
+        return None
+    return [(int(movie), int(person)) for movie, person in trace(parent, via, source, target)]
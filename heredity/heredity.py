@@ -1,6 +1,8 @@
+import argparse
 import csv
 import itertools
-import sys
+
+import inference
 
 PROBS = {
 
@@ -38,10 +40,32 @@ PROBS = {
 
 
 def main():
-    # Check for proper usage
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python heredity.py data.csv")
-    people = load_data(sys.argv[1])
+    parser = argparse.ArgumentParser(description="Compute gene and trait probabilities for a family.")
+    parser.add_argument("data", help="CSV of people, their parents and known traits")
+    parser.add_argument("--method", choices=METHODS, default="elimination",
+                        help="exact inference by variable elimination, by enumerating every "
+                             "assignment of genes and traits, or of genes alone")
+    args = parser.parse_args()
+    people = load_data(args.data)
+
+    probabilities = METHODS[args.method](people)
+
+    # Print results
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f}")
+
+
+def enumerate_probabilities(people):
+    """
+    Compute the gene and trait distribution of each person by summing
+    `joint_probability` over every assignment of genes and traits that
+    agrees with the known traits.
+    """
 
     # Keep track of gene and trait probabilities for each person
     probabilities = {
@@ -81,22 +105,78 @@ def main():
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
+    return probabilities
 
-    # Print results
-    for person in people:
-        print(f"{person}:")
-        for field in probabilities[person]:
-            print(f"  {field.capitalize()}:")
-            for value in probabilities[person][field]:
-                p = probabilities[person][field][value]
-                print(f"    {value}: {p:.4f}")
+
+def enumerate_genes_probabilities(people):
+    """
+    Compute the gene and trait distribution of each person by summing
+    over every assignment of genes, but not of traits.
+
+    A person's trait depends only on their own genes, so for each gene
+    assignment the unknown traits sum out in closed form: the assignment
+    is weighted by the probability of the known traits alone, and each
+    person whose trait is unknown has it with probability
+    `PROBS["trait"][genes][True]`. This gives the same result as
+    `enumerate_probabilities` without its loop over sets of traits.
+    """
+    probabilities = {
+        person: {
+            "gene": {
+                2: 0,
+                1: 0,
+                0: 0
+            },
+            "trait": {
+                True: 0,
+                False: 0
+            }
+        }
+        for person in people
+    }
+
+    names = set(people)
+    for one_gene in powerset(names):
+        for two_genes in powerset(names - one_gene):
+
+            # Probability of these genes and of the known traits
+            p = 1
+            for person in names:
+                genes = 1 if person in one_gene else 2 if person in two_genes else 0
+                p *= gene_probability(people[person], genes, one_gene, two_genes)
+                if people[person]["trait"] is not None:
+                    p *= PROBS["trait"][genes][people[person]["trait"]]
+
+            for person in names:
+                genes = 1 if person in one_gene else 2 if person in two_genes else 0
+                probabilities[person]["gene"][genes] += p
+                if people[person]["trait"] is not None:
+                    probabilities[person]["trait"][people[person]["trait"]] += p
+                else:
+                    for trait in (True, False):
+                        probabilities[person]["trait"][trait] += p * PROBS["trait"][genes][trait]
+
+    normalize(probabilities)
+    return probabilities
+
+
+def eliminate_probabilities(people):
+    """
+    Compute the gene and trait distribution of each person by variable
+    elimination over the pedigree, which takes time linear in the number
+    of people for family trees without many marriages between relatives.
+    """
+    return inference.marginals(people, PROBS)
 
 
 def load_data(filename):
     """
     Load gene and trait data from a file into a dictionary.
     File assumed to be a CSV containing fields name, mother, father, trait.
-    mother, father must both be blank, or both be valid names in the CSV.
+    mother, father must each be blank or a valid name in the CSV. If
+    both are blank, the person's genes follow the unconditional
+    probabilities; if only one is, that parent is taken to have no
+    copies of the gene.
     trait should be 0 or 1 if trait is known, blank otherwise.
     """
     data = dict()
@@ -142,32 +222,13 @@ def joint_probability(people, one_gene, two_genes, have_trait):
 
     for p in people:
         person = people[p]
-        p_probability = 1
 
         # How many genes should the person have?
         p_genes = 1 if p in one_gene else 2 if p in two_genes else 0
         p_trait = p in have_trait
 
-
-        # Unconditional probability if person does not have parents
-        if not person["mother"] and not person["father"]:
-            p_probability *= PROBS["gene"][p_genes]
-        else:
-            # Probability that a parent passes down the gene
-            mother = parent_probability(person["mother"], one_gene, two_genes)
-            father = parent_probability(person["father"], one_gene, two_genes)
-
-            # Probability that both parents pass down a gene each
-            if p_genes == 2:
-                p_probability *= mother * father
-            # Probability of getting the trait from one but not from the other
-            elif p_genes == 1:
-                p_probability *= ((1 - father) * mother) + ((1 - mother) * father)
-            # Probability of getting the gene from neither parent
-            else:
-                p_probability *= (1 - mother) * (1 - father)
-
-        # Probability that the person has the trait
+        # Probability of the person's genes, then that they have the trait
+        p_probability = gene_probability(person, p_genes, one_gene, two_genes)
         p_probability *= PROBS["trait"][p_genes][p_trait]
 
         probability *= p_probability
@@ -175,6 +236,31 @@ def joint_probability(people, one_gene, two_genes, have_trait):
     return probability
 
 
+def gene_probability(person, p_genes, one_gene, two_genes):
+    """
+    Return the probability that `person` has `p_genes` copies of the
+    gene, given the genes of their parents in `one_gene` and `two_genes`.
+    """
+
+    # Unconditional probability if person does not have parents
+    if not person["mother"] and not person["father"]:
+        return PROBS["gene"][p_genes]
+
+    # Probability that a parent passes down the gene
+    mother = parent_probability(person["mother"], one_gene, two_genes)
+    father = parent_probability(person["father"], one_gene, two_genes)
+
+    # Probability that both parents pass down a gene each
+    if p_genes == 2:
+        return mother * father
+    # Probability of getting the trait from one but not from the other
+    elif p_genes == 1:
+        return ((1 - father) * mother) + ((1 - mother) * father)
+    # Probability of getting the gene from neither parent
+    else:
+        return (1 - mother) * (1 - father)
+
+
 def parent_probability(parent, one_gene, two_genes):
     if parent in two_genes:
         return 1 - PROBS["mutation"]
@@ -219,5 +305,13 @@ def normalize(probabilities):
                                           probabilities[person]['trait'].items()}
 
 
+# Ways of computing the probabilities, by name
+METHODS = {
+    "elimination": eliminate_probabilities,
+    "enumerate": enumerate_probabilities,
+    "enumerate-genes": enumerate_genes_probabilities
+}
+
+
 if __name__ == "__main__":
     main()
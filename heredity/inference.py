@@ -0,0 +1,249 @@
+import heapq
+import itertools
+
+GENES = (0, 1, 2)
+
+
+class Factor():
+    """
+    Table of non-negative values over the gene counts of some people.
+
+    `variables` is a tuple of names, and `values` maps each tuple of gene
+    counts, one per variable in that order, to a value.
+    """
+
+    def __init__(self, variables, values):
+        self.variables = tuple(variables)
+        self.values = values
+
+    @classmethod
+    def from_function(cls, variables, function):
+        """
+        Returns the factor whose value for each assignment of gene counts
+        to `variables` is `function` of that assignment.
+        """
+        return cls(variables, {
+            assignment: function(*assignment)
+            for assignment in itertools.product(GENES, repeat=len(variables))
+        })
+
+    def multiply(self, other):
+        """
+        Returns the product of this factor and `other`, over the union of
+        their variables.
+        """
+        variables = self.variables + tuple(v for v in other.variables if v not in self.variables)
+        mine = [variables.index(v) for v in self.variables]
+        theirs = [variables.index(v) for v in other.variables]
+        return Factor.from_function(variables, lambda *assignment: (
+            self.values[tuple(assignment[i] for i in mine)]
+            * other.values[tuple(assignment[i] for i in theirs)]
+        ))
+
+    def sum_out(self, variable):
+        """
+        Returns this factor with `variable` summed out.
+        """
+        position = self.variables.index(variable)
+        values = {}
+        for assignment, value in self.values.items():
+            rest = assignment[:position] + assignment[position + 1:]
+            values[rest] = values.get(rest, 0) + value
+        return Factor(self.variables[:position] + self.variables[position + 1:], values)
+
+    def project(self, variables):
+        """
+        Returns this factor with every variable not in `variables` summed out.
+        """
+        factor = self
+        for variable in self.variables:
+            if variable not in variables:
+                factor = factor.sum_out(variable)
+        return factor
+
+    def divide(self, other):
+        """
+        Returns this factor divided by `other`, whose variables must all be
+        among this factor's, taking 0 / 0 to be 0.
+        """
+        theirs = [self.variables.index(v) for v in other.variables]
+        values = {}
+        for assignment, value in self.values.items():
+            divisor = other.values[tuple(assignment[i] for i in theirs)]
+            values[assignment] = value / divisor if divisor else 0
+        return Factor(self.variables, values)
+
+
+def product(factors):
+    """
+    Returns the product of `factors`, or a constant 1 if there are none.
+    """
+    result = Factor((), {(): 1})
+    for factor in factors:
+        result = result.multiply(factor)
+    return result
+
+
+def pedigree_factors(people, probs):
+    """
+    Returns a factor for each person in `people`: the probability of
+    their gene count, given their parents' gene counts if they have
+    parents, times the probability of their trait if it is known.
+    """
+    def passes(genes):
+        # Probability that a parent with `genes` copies passes one on
+        return {2: 1 - probs["mutation"], 1: 0.5, 0: probs["mutation"]}[genes]
+
+    def inherit(genes, mother=0, father=0):
+        m, f = passes(mother), passes(father)
+        return (m * f if genes == 2 else
+                m * (1 - f) + f * (1 - m) if genes == 1 else
+                (1 - m) * (1 - f))
+
+    factors = []
+    for name, person in people.items():
+        trait = person["trait"]
+
+        def evidence(genes):
+            return 1 if trait is None else probs["trait"][genes][trait]
+
+        # A parent who is not listed is taken to have no copies of the gene
+        # and is left out of the factor's variables
+        parents = [parent for parent in (person["mother"], person["father"]) if parent]
+        if not parents:
+            factors.append(Factor.from_function(
+                (name,), lambda genes: probs["gene"][genes] * evidence(genes)
+            ))
+        else:
+            factors.append(Factor.from_function(
+                (*parents, name),
+                lambda *assignment: inherit(assignment[-1], *assignment[:-1]) * evidence(assignment[-1])
+            ))
+    return factors
+
+
+def elimination_order(factors):
+    """
+    Returns an order in which to eliminate the variables of `factors`,
+    chosen greedily to add the fewest new edges between the variables
+    left (min-fill), with ties broken by fewest neighbours.
+    """
+    neighbors = {}
+    for factor in factors:
+        for variable in factor.variables:
+            neighbors.setdefault(variable, set()).update(factor.variables)
+    for variable in neighbors:
+        neighbors[variable].discard(variable)
+
+    def score(variable):
+        around = list(neighbors[variable])
+        fill = sum(
+            1 for i, a in enumerate(around) for b in around[i + 1:]
+            if b not in neighbors[a]
+        )
+        return (fill, len(around))
+
+    # Scores change as variables are eliminated, so stale heap entries
+    # are skipped by checking them against the current score
+    scores = {variable: score(variable) for variable in neighbors}
+    heap = [(s, variable) for variable, s in scores.items()]
+    heapq.heapify(heap)
+    order = []
+    while heap:
+        s, variable = heapq.heappop(heap)
+        if variable not in scores or scores[variable] != s:
+            continue
+        order.append(variable)
+        around = neighbors.pop(variable)
+        del scores[variable]
+        for a in around:
+            neighbors[a].discard(variable)
+            neighbors[a].update(around - {a})
+
+        # Eliminating a variable can change the score of its neighbours
+        # and of their neighbours
+        affected = set(around)
+        for a in around:
+            affected.update(neighbors[a])
+        for a in affected:
+            scores[a] = score(a)
+            heapq.heappush(heap, (scores[a], a))
+    return order
+
+
+def gene_marginals(people, probs):
+    """
+    Returns a dictionary mapping each person to the probability of each
+    gene count given all the known traits, by exact inference.
+
+    Variables are eliminated in `elimination_order`, and each elimination
+    forms a cluster: the product of the factors over the variable, which
+    passes the variable summed out on to the cluster that later
+    eliminates one of the variables left. These clusters form a tree
+    whose width is set by the elimination order rather than the number
+    of people. Passing messages back down the tree from its roots then
+    gives every cluster its belief, so all the marginals come from two
+    passes rather than one elimination per person.
+    """
+    factors = pedigree_factors(people, probs)
+    order = elimination_order(factors)
+
+    # Upward pass: variable elimination, recording the clusters formed
+    pool = {i: factor for i, factor in enumerate(factors)}
+    sources = {i: None for i in pool}
+    potentials = {}
+    children = {variable: [] for variable in order}
+    messages = {}
+    parent = {}
+    for variable in order:
+        used = [i for i, factor in pool.items() if variable in factor.variables]
+        potentials[variable] = product(pool[i] for i in used if sources[i] is None)
+        for i in used:
+            if sources[i] is not None:
+                children[variable].append(sources[i])
+                parent[sources[i]] = variable
+            del pool[i]
+        cluster = product([potentials[variable]] + [messages[child] for child in children[variable]])
+        messages[variable] = cluster.sum_out(variable)
+        key = len(sources)
+        pool[key] = messages[variable]
+        sources[key] = variable
+
+    # Downward pass: each cluster's belief is its potential times the
+    # messages from its children and the message from its parent
+    beliefs = {}
+    for variable in reversed(order):
+        belief = product([potentials[variable]] + [messages[child] for child in children[variable]])
+        if variable in parent:
+            above = beliefs[parent[variable]]
+            separator = messages[variable].variables
+            belief = belief.multiply(above.project(separator).divide(messages[variable]))
+        beliefs[variable] = belief
+
+    marginals = {}
+    for variable in order:
+        values = beliefs[variable].project((variable,)).values
+        total = sum(values.values())
+        marginals[variable] = {genes: values[(genes,)] / total for genes in (2, 1, 0)}
+    return marginals
+
+
+def marginals(people, probs):
+    """
+    Returns the gene and trait distribution of each person given the
+    known traits, in the form built by `heredity.main`.
+
+    A person's trait depends only on their own gene count, so the trait
+    distribution of anyone whose trait is unknown follows from their
+    gene distribution.
+    """
+    genes = gene_marginals(people, probs)
+    probabilities = {}
+    for name, person in people.items():
+        if person["trait"] is None:
+            have = sum(p * probs["trait"][g][True] for g, p in genes[name].items())
+            trait = {True: have, False: 1 - have}
+        else:
+            trait = {True: float(person["trait"]), False: float(not person["trait"])}
+        probabilities[name] = {"gene": genes[name], "trait": trait}
+    return probabilities
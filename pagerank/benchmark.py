@@ -0,0 +1,122 @@
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+
+import numpy as np
+
+# Damping factor and tolerance of the reference solution
+DAMPING = 0.85
+REFERENCE_TOLERANCE = 1e-13
+
+# Phases that can be timed, besides iteration by each solver
+PHASES = ["crawl", "sample"]
+
+
+def peak_memory():
+    """
+    Returns the peak resident memory of this process in MiB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def run(directory, phase, samples, workers, seed):
+    """
+    Time `phase` over the corpus in `directory`: crawling it, sampling
+    `samples` pages, or iterating with the solver named by "iterate:",
+    and measure the error of the ranks against a reference solution.
+    Peak memory is that of the whole process, so each phase is run by
+    `run_in_process`.
+    """
+    import pagerank
+    import solvers
+    from linkgraph import LinkGraph
+
+    result = {"phase": phase}
+    start = time.perf_counter()
+    corpus = pagerank.crawl(directory, workers, cache=False)
+    result["crawl_time"] = time.perf_counter() - start
+    result["crawl_memory"] = peak_memory()
+    if phase == "crawl":
+        result["time"] = result["crawl_time"]
+        result["pages"] = len(corpus)
+        result["links"] = sum(len(links) for links in corpus.values())
+        result["peak_memory"] = peak_memory()
+        return result
+
+    start = time.perf_counter()
+    if phase == "sample":
+        ranks = pagerank.sample_pagerank(corpus, DAMPING, samples, seed=seed, workers=workers)
+    else:
+        ranks = pagerank.iterate_pagerank(corpus, DAMPING, method=phase.split(":", 1)[1])
+        result["iterations"] = pagerank.iteration_stats["iterations"]
+    result["time"] = time.perf_counter() - start
+    result["peak_memory"] = peak_memory()
+
+    graph = LinkGraph.from_corpus(corpus)
+    reference, _ = solvers.power_iteration(graph, DAMPING, REFERENCE_TOLERANCE)
+    errors = np.abs(np.array([ranks[name] for name in graph.names]) - reference)
+    result["l1_error"] = float(errors.sum())
+    result["max_error"] = float(errors.max())
+    return result
+
+
+def send_result(connection, args):
+    connection.send(run(*args))
+    connection.close()
+
+
+def run_in_process(*args):
+    """
+    Returns the result of `run(*args)` from a new spawned process, which
+    unlike a pool worker can start the crawling and sampling pools.
+    """
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=send_result, args=(sender, args))
+    process.start()
+    sender.close()
+    try:
+        return receiver.recv()
+    except EOFError:
+        raise Exception(f"benchmark process exited with code {process.exitcode}")
+    finally:
+        process.join()
+
+
+def report(result, out=sys.stdout):
+    """
+    Print the timing, memory use and error measured by `run`.
+    """
+    if result["phase"] == "crawl":
+        out.write(f"{result['phase']:<22}{result['time']:>10.2f}{'':>10}{result['peak_memory']:>12.0f}"
+                  f"   {result['pages']} pages, {result['links']} links\n")
+        return
+    detail = f"{result['iterations']} iterations" if "iterations" in result else ""
+    out.write(f"{result['phase']:<22}{result['time']:>10.2f}"
+              f"{result['peak_memory'] - result['crawl_memory']:>10.0f}{result['peak_memory']:>12.0f}"
+              f"{result['l1_error']:>12.2e}{result['max_error']:>12.2e}   {detail}\n")
+
+
+def main():
+    import solvers
+
+    parser = argparse.ArgumentParser(description="Benchmark crawling and ranking a PageRank corpus.")
+    parser.add_argument("directory")
+    parser.add_argument("--samples", type=int, default=10 ** 6)
+    parser.add_argument("--phases", nargs="+", default=PHASES + [f"iterate:{m}" for m in solvers.SOLVERS],
+                        help=f"any of {', '.join(PHASES)} and iterate:<solver>")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes for crawling and sampling")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"{'phase':<22}{'seconds':>10}{'+MiB':>10}{'peak MiB':>12}{'L1 error':>12}{'max error':>12}")
+    for phase in args.phases:
+        report(run_in_process(args.directory, phase, args.samples, args.workers, args.seed))
+
+
+if __name__ == "__main__":
+    main()
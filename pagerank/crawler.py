@@ -0,0 +1,119 @@
+import json
+import multiprocessing
+import os
+import re
+
+LINK = re.compile(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"")
+
+# Characters of a page read at a time
+CHUNK_SIZE = 1 << 20
+
+# Longest link tag that is still found when it straddles two chunks
+MAX_TAG = 1 << 12
+
+# Cache of the links found in each page, kept in the corpus directory
+CACHE = ".pagerank-links.json"
+CACHE_VERSION = 1
+
+
+def extract_links(path):
+    """
+    Returns the set of link targets in the HTML file at `path`.
+
+    The file is read a chunk at a time. Text after the last link found
+    in a chunk is carried over to the next, so that a link tag split
+    across two chunks is still found.
+    """
+    links = set()
+    carry = ""
+    with open(path) as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            text = carry + chunk
+            end = 0
+            for match in LINK.finditer(text):
+                links.add(match.group(1))
+                end = match.end()
+            carry = text[max(end, len(text) - MAX_TAG):]
+    return links
+
+
+def page_links(task):
+    """
+    Returns (filename, links) for the page `filename` in `directory`.
+    """
+    directory, filename = task
+    return filename, extract_links(os.path.join(directory, filename))
+
+
+def read_cache(directory):
+    """
+    Returns the cached links of the pages in `directory`, as a dictionary
+    mapping each filename to [mtime, size, links], or an empty dictionary
+    if there is no usable cache.
+    """
+    try:
+        with open(os.path.join(directory, CACHE)) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(cache, dict) or cache.get("version") != CACHE_VERSION:
+        return {}
+    return cache["pages"]
+
+
+def write_cache(directory, pages):
+    """
+    Save `pages`, mapping filenames to [mtime, size, links], as the link
+    cache of `directory`.
+    """
+    path = os.path.join(directory, CACHE)
+    try:
+        with open(path + ".tmp", "w") as f:
+            json.dump({"version": CACHE_VERSION, "pages": pages}, f)
+        os.replace(path + ".tmp", path)
+    except OSError:
+        # A read-only corpus can still be crawled, just not cached
+        pass
+
+
+def crawl_links(directory, workers=None, cache=True):
+    """
+    Returns a dictionary mapping every .html file in `directory` to the
+    set of links it contains, including links to pages outside the corpus.
+
+    Pages are parsed by a pool of `workers` processes. With `cache`, the
+    links of each page are saved alongside its modification time and
+    size, and only pages that are new or have changed since the last
+    crawl are parsed again.
+    """
+    cached = read_cache(directory) if cache else {}
+    entries = {}
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.endswith(".html") and entry.is_file():
+                stat = entry.stat()
+                entries[entry.name] = [stat.st_mtime_ns, stat.st_size]
+
+    pages = {}
+    stale = []
+    for filename, key in entries.items():
+        if filename in cached and cached[filename][:2] == key:
+            pages[filename] = set(cached[filename][2])
+        else:
+            stale.append((directory, filename))
+
+    if workers is not None and workers > 1 and len(stale) > 1:
+        with multiprocessing.Pool(workers) as pool:
+            pages.update(pool.imap_unordered(page_links, stale, chunksize=64))
+    else:
+        pages.update(map(page_links, stale))
+
+    if cache and (stale or len(cached) != len(entries)):
+        write_cache(directory, {
+            filename: key + [sorted(pages[filename])]
+            for filename, key in entries.items()
+        })
+    return pages
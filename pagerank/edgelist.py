@@ -0,0 +1,155 @@
+import json
+import mmap
+import multiprocessing
+import os
+import shutil
+import struct
+
+import numpy as np
+
+import crawler
+from linkgraph import LinkGraph
+
+MAGIC = b"PRLINKS1"
+
+# Sections are aligned so every array can be viewed in place
+ALIGNMENT = 8
+
+
+class NameTable():
+    """
+    Page names stored back to back as UTF-8, with an offsets array, so
+    that names can be read from a mapped file without decoding them all.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return str(self.data[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+def write(directory, path, workers=None):
+    """
+    Crawl the HTML pages in `directory` into a link graph file at `path`,
+    holding only the page names and link offsets in memory.
+
+    Pages are numbered in sorted order of their names, and the links of
+    each page are written in turn, sorted and as page numbers, to a
+    temporary file next to `path`. The file is then assembled from the
+    name table, the offset of each page's links, and those links, which
+    makes it a compressed sparse row graph sorted by source, the same
+    as `save` writes.
+
+    Returns the number of pages.
+    """
+    names = sorted(
+        entry.name for entry in os.scandir(directory)
+        if entry.name.endswith(".html") and entry.is_file()
+    )
+    index = {name: i for i, name in enumerate(names)}
+    offsets = np.zeros(len(names) + 1, dtype=np.int64)
+
+    tasks = ((directory, name) for name in names)
+    with open(f"{path}.links.tmp", "wb") as links:
+        if workers is not None and workers > 1:
+            with multiprocessing.Pool(workers) as pool:
+                write_links(pool.imap(crawler.page_links, tasks, chunksize=64), index, offsets, links)
+        else:
+            write_links(map(crawler.page_links, tasks), index, offsets, links)
+
+    with open(f"{path}.links.tmp", "rb") as links:
+        assemble(path, names, offsets, lambda f: shutil.copyfileobj(links, f))
+    os.remove(f"{path}.links.tmp")
+    return len(names)
+
+
+def save(graph, path):
+    """
+    Write the `LinkGraph` `graph` to a link graph file at `path`.
+    """
+    targets = np.ascontiguousarray(graph.targets, dtype="<i4")
+    assemble(path, graph.names, graph.offsets, lambda f: f.write(targets))
+
+
+def assemble(path, names, offsets, write_targets):
+    """
+    Write a link graph file at `path` from the page `names`, the
+    `offsets` of each page's links, and a function that writes the
+    link targets to the open file.
+    """
+    encoded = [name.encode("utf-8") for name in names]
+    name_offsets = np.zeros(len(encoded) + 1, dtype="<i8")
+    np.cumsum([len(name) for name in encoded], out=name_offsets[1:])
+    sections = {
+        "name_offsets": name_offsets,
+        "names": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+        "offsets": np.ascontiguousarray(offsets, dtype="<i8")
+    }
+
+    # Lay out sections after the header, each on an aligned offset
+    layout = {}
+    position = 0
+    for name, section in sections.items():
+        layout[name] = [section.dtype.str, position, section.nbytes]
+        position = align(position + section.nbytes)
+    layout["targets"] = ["<i4", position, int(offsets[-1]) * 4]
+
+    header = json.dumps({"sections": layout}).encode()
+    start = align(len(MAGIC) + 8 + len(header))
+    with open(f"{path}.tmp", "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<Q", len(header)))
+        f.write(header)
+        for name, section in sections.items():
+            f.write(b"\0" * (start + layout[name][1] - f.tell()))
+            f.write(section)
+        f.write(b"\0" * (start + layout["targets"][1] - f.tell()))
+        write_targets(f)
+    os.replace(f"{path}.tmp", path)
+
+
+def write_links(pages, index, offsets, out):
+    """
+    Write the links of each (name, links) pair in `pages`, in page order,
+    to `out` as sorted page numbers, filling in `offsets` as they go.
+    Links to pages outside the corpus and to the page itself are ignored.
+    """
+    for name, links in pages:
+        i = index[name]
+        targets = sorted(index[link] for link in links if link in index and link != name)
+        out.write(np.array(targets, dtype="<i4").tobytes())
+        offsets[i + 1] = offsets[i] + len(targets)
+
+
+def read(path):
+    """
+    Memory-map the link graph file at `path` as a `LinkGraph` whose
+    names, offsets and targets are all read from the map on demand.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise Exception(f"{path} is not a link graph file")
+        (length,) = struct.unpack("<Q", f.read(8))
+        header = json.loads(f.read(length))
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    start = align(len(MAGIC) + 8 + length)
+    sections = {
+        name: np.frombuffer(buffer, dtype=dtype, count=size // np.dtype(dtype).itemsize, offset=start + offset)
+        for name, (dtype, offset, size) in header["sections"].items()
+    }
+    names = NameTable(sections["name_offsets"], sections["names"])
+    return LinkGraph(names, sections["offsets"], sections["targets"])
+
+
+def align(position):
+    return (position + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
@@ -0,0 +1,128 @@
+import numpy as np
+
+
+class LinkGraph():
+    """
+    Link structure of a corpus in compressed sparse row form.
+
+    Pages are numbered by their position in `names`, and the pages
+    linked to by page `i` are `targets[offsets[i]:offsets[i + 1]]`.
+    """
+
+    def __init__(self, names, offsets, targets):
+        self.names = names
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.targets = np.asarray(targets, dtype=np.int32)
+        self.out_degree = np.diff(self.offsets)
+        self.dangling = self.out_degree == 0
+        self._index = None
+        self._sources = None
+        self._in_links = None
+        self._in_groups = None
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build a graph from a dictionary mapping each page to the set of
+        pages it links to, as returned by `crawl`. Links to pages outside
+        the corpus and to the page itself are ignored.
+        """
+        names = sorted(corpus)
+        index = {name: i for i, name in enumerate(names)}
+        offsets = [0]
+        targets = []
+        for name in names:
+            targets.extend(sorted(index[link] for link in corpus[name] if link in index and link != name))
+            offsets.append(len(targets))
+        graph = cls(names, offsets, targets)
+        graph._index = index
+        return graph
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def index(self):
+        """
+        Returns a dictionary mapping each page name to its number.
+        """
+        if self._index is None:
+            self._index = {name: i for i, name in enumerate(self.names)}
+        return self._index
+
+    @property
+    def sources(self):
+        """
+        Returns the page each link comes from, aligned with `targets`.
+        """
+        if self._sources is None:
+            self._sources = np.repeat(np.arange(len(self), dtype=np.int32), self.out_degree)
+        return self._sources
+
+    @property
+    def in_links(self):
+        """
+        Returns (in_offsets, in_sources): the links in compressed sparse
+        row form by target, so that the pages linking to page `i` are
+        `in_sources[in_offsets[i]:in_offsets[i + 1]]`.
+        """
+        if self._in_links is None:
+            order = np.argsort(self.targets, kind="stable")
+            in_degree = np.bincount(self.targets, minlength=len(self))
+            in_offsets = np.concatenate(([0], np.cumsum(in_degree)))
+            self._in_links = (in_offsets, self.sources[order])
+        return self._in_links
+
+    @property
+    def in_groups(self):
+        """
+        Returns a list of (pages, sources) pairs, one for each number `d`
+        of incoming links that some pages have, where row `j` of the
+        (len(pages) x d) array `sources` holds the pages linking to
+        `pages[j]`.
+        """
+        if self._in_groups is None:
+            in_offsets, in_sources = self.in_links
+            in_degree = np.diff(in_offsets)
+            self._in_groups = []
+            for degree in np.unique(in_degree[in_degree > 0]):
+                pages = np.flatnonzero(in_degree == degree)
+                sources = in_sources[in_offsets[pages][:, None] + np.arange(degree)]
+                self._in_groups.append((pages, sources))
+        return self._in_groups
+
+    def propagate(self, ranks):
+        """
+        Returns the rank each page receives when every page passes its
+        rank on equally to the pages it links to, or to every page in the
+        corpus if it has no links.
+        """
+        n = len(self)
+        share = np.divide(ranks, self.out_degree, out=np.zeros(n), where=~self.dangling)
+        received = np.bincount(self.targets, weights=share[self.sources], minlength=n)
+        received += ranks[self.dangling].sum() / n
+        return received
+
+    def propagate_links(self, ranks):
+        """
+        Returns the rank each page receives along links alone, for every
+        column of the (pages x k) matrix `ranks` at once. Pages with no
+        links pass on nothing.
+
+        Pages with the same number of incoming links are handled
+        together, gathering the whole rows of their linking pages into
+        one array and summing it, so the columns are processed side by
+        side rather than one at a time.
+        """
+        share = ranks / np.maximum(self.out_degree, 1)[:, None]
+        share[self.dangling] = 0
+        received = np.zeros(ranks.shape)
+        for pages, sources in self.in_groups:
+            received[pages] = share[sources].sum(axis=1)
+        return received
+
+    def to_dict(self, values):
+        """
+        Returns a dictionary mapping each page name to its entry of `values`.
+        """
+        return dict(zip(self.names, values.tolist()))
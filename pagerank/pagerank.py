@@ -1,55 +1,100 @@
-import copy
-import math
+import argparse
 import os
-import random
-import re
-import sys
+
+import numpy as np
+
+import crawler
+import edgelist
+import incremental
+import sampling
+import solvers
+from linkgraph import LinkGraph
 
 DAMPING = 0.85
 SAMPLES = 10000
 
+# Convergence of the last call to iterate_pagerank: the number of
+# iterations and the L1 change in ranks of each
+iteration_stats = {"iterations": 0, "residuals": []}
+
 
 def main():
-    if len(sys.argv) != 2:
-        sys.exit("Usage: python pagerank.py corpus")
-    corpus = crawl(sys.argv[1])
-    ranks = sample_pagerank(corpus, DAMPING, SAMPLES)
+    parser = argparse.ArgumentParser(description="Rank the pages of a corpus by PageRank.")
+    parser.add_argument("corpus", help="directory of HTML pages, or a link graph saved with --save")
+    parser.add_argument("--save", metavar="FILE", help="also save the crawled link graph to FILE")
+    parser.add_argument("--damping", type=float, default=DAMPING)
+    args = parser.parse_args()
+
+    if os.path.isdir(args.corpus):
+        corpus = crawl(args.corpus, save=args.save)
+    else:
+        corpus = load_graph(args.corpus)
+    ranks = sample_pagerank(corpus, args.damping, SAMPLES)
     print(f"PageRank Results from Sampling (n = {SAMPLES})")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
-    ranks = iterate_pagerank(corpus, DAMPING)
-    print(f"PageRank Results from Iteration")
+    ranks = iterate_pagerank(corpus, args.damping)
+    print(f"PageRank Results from Iteration ({iteration_stats['iterations']} iterations)")
     for page in sorted(ranks):
         print(f"  {page}: {ranks[page]:.4f}")
 
 
-def crawl(directory):
+def crawl(directory, workers=None, cache=True, save=None):
     """
     Parse a directory of HTML pages and check for links to other pages.
     Return a dictionary where each key is a page, and values are
     a list of all other pages in the corpus that are linked to by the page.
-    """
-    pages = dict()
 
-    # Extract all links from HTML files
-    for filename in os.listdir(directory):
-        if not filename.endswith(".html"):
-            continue
-        with open(os.path.join(directory, filename)) as f:
-            contents = f.read()
-            links = re.findall(r"<a\s+(?:[^>]*?)href=\"([^\"]*)\"", contents)
-            pages[filename] = set(links) - {filename}
+    Pages are parsed in `workers` processes, and with `cache` the links
+    found in each page are kept in the directory, so that a later crawl
+    only parses the pages that have changed. With `save`, the links are
+    also written to a link graph file at that path, which `load_graph`
+    reads back without parsing any HTML.
+    """
+    pages = crawler.crawl_links(directory, workers, cache)
 
     # Only include links to other pages in the corpus
     for filename in pages:
         pages[filename] = set(
             link for link in pages[filename]
-            if link in pages
+            if link in pages and link != filename
         )
 
+    if save is not None:
+        edgelist.save(LinkGraph.from_corpus(pages), save)
     return pages
 
 
+def load_graph(path):
+    """
+    Return the link graph saved at `path` by `crawl` or `crawl_to_disk`,
+    memory-mapped rather than read. Every ranking function accepts it in
+    place of a corpus.
+    """
+    return edgelist.read(path)
+
+
+def link_graph(corpus):
+    """
+    Return `corpus` as a `LinkGraph`, converting it if it is a dictionary
+    returned by `crawl`.
+    """
+    if isinstance(corpus, LinkGraph):
+        return corpus
+    return LinkGraph.from_corpus(corpus)
+
+
+def crawl_to_disk(directory, path, workers=None):
+    """
+    Parse a directory of HTML pages like `crawl`, but write the links to
+    a memory-mappable link graph file at `path` instead of returning them,
+    for corpora too large to hold as a dictionary.
+
+    Return the number of pages.
+    """
+    return edgelist.write(directory, path, workers)
+
+
 def transition_model(corpus, page, damping_factor):
     """
     Return a probability distribution over which page to visit next,
@@ -78,60 +123,141 @@ def transition_model(corpus, page, damping_factor):
     return res
 
 
-def sample_pagerank(corpus, damping_factor, n):
+def sample_pagerank(corpus, damping_factor, n, seed=None, walkers=sampling.WALKERS, workers=None):
     """
     Return PageRank values for each page by sampling `n` pages
     according to transition model, starting with a page at random.
 
+    The samples are drawn by `walkers` independent random surfers that
+    take their steps together as NumPy array operations, each step
+    costing O(1) per surfer rather than a pass over the whole corpus.
+    Passing `seed` makes the result reproducible, and `workers` splits
+    the samples across that many processes. `corpus` may also be a
+    link graph from `load_graph`.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
+    graph = link_graph(corpus)
+    counts = sampling.parallel_visit_counts(graph, damping_factor, n, walkers, seed, workers)
+    return graph.to_dict(counts / n)
 
-    res = {page: 0.0 for page in corpus}
-    pages = list(corpus.keys())
-    page = random.choice(pages)
-
-    for i in range(n):
-        tm = transition_model(corpus, page, damping_factor)
-        probabilities = tm.values()
 
-        page = random.choices(pages, weights=list(probabilities))[0]
-        res[page] += (1 / n)
+def sample_pagerank_within(corpus, damping_factor, error, confidence=0.95, seed=None, workers=None):
+    """
+    Return PageRank values for each page by sampling, like
+    `sample_pagerank`, but draw only as many samples as it takes to know
+    every value to within `error` at the given `confidence`, rather than
+    a fixed number. The number drawn is kept in `iteration_stats`.
 
-    return res
+    Return a pair of dictionaries where keys are page names: the first
+    maps to their estimated PageRank value, and the second to the
+    half-width of the confidence interval around it.
+    """
+    graph = link_graph(corpus)
+    ranks, errors, samples = sampling.sample_until(graph, damping_factor, error, confidence,
+                                                   seed=seed, workers=workers)
+    iteration_stats["samples"] = samples
+    return graph.to_dict(ranks), graph.to_dict(errors)
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, tolerance=solvers.TOLERANCE, method="power"):
     """
     Return PageRank values for each page by iteratively updating
     PageRank values until convergence.
 
+    The corpus is turned into a sparse link matrix once, and the ranks
+    are updated by vectorized power iteration until the L1 norm of their
+    change falls below `tolerance`. Pages with no links are treated as
+    linking to every page, as in `transition_model`. `method` picks
+    another solver from `solvers.SOLVERS`, such as "gauss-seidel", and
+    the residual of each of its iterations is kept in `iteration_stats`
+    to compare them. `corpus` may also be a link graph from `load_graph`.
+
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
     PageRank values should sum to 1.
     """
-    total_pages = len(corpus)
-    res = {p: 1 / total_pages for p in corpus}
+    graph = link_graph(corpus)
+    if method not in solvers.SOLVERS:
+        raise Exception(f"unknown method {method}, expected one of {', '.join(solvers.SOLVERS)}")
+    ranks, residuals = solvers.SOLVERS[method](graph, damping_factor, tolerance)
+    iteration_stats["iterations"] = len(residuals)
+    iteration_stats["residuals"] = residuals
+    return graph.to_dict(ranks)
 
-    diff = math.inf
-    min_diff = 0.001
-    base_probability = (1 - damping_factor) / total_pages
 
-    while diff > min_diff:
-        old = copy.deepcopy(res)
-        for page in corpus:
-            res[page] = base_probability + sum_of_linking_pages(corpus, page, res, damping_factor)
-            diff = abs(old[page] - res[page])
-    return res
+def stream_pagerank(path, damping_factor, tolerance=solvers.TOLERANCE):
+    """
+    Return PageRank values for each page of the link graph file at
+    `path`, written by `crawl_to_disk`, as `iterate_pagerank` would.
+
+    The file is memory-mapped and its links are streamed from it in
+    blocks on every iteration, rather than loaded.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    graph = load_graph(path)
+    ranks, residuals = solvers.streaming_power_iteration(graph, damping_factor, tolerance)
+    iteration_stats["iterations"] = len(residuals)
+    iteration_stats["residuals"] = residuals
+    return graph.to_dict(ranks)
+
 
+def update_pagerank(corpus, ranks, changes, damping_factor, tolerance=incremental.TOLERANCE):
+    """
+    Return PageRank values for each page of `corpus`, updated from the
+    values `ranks` that were computed before some of its pages changed.
 
-def sum_of_linking_pages(corpus, page, distributions, damping_factor):
-    total = 0.0
-    for p in corpus:
-        if page in corpus[p]:
-            total += distributions[p] / len(corpus[p])
-    return damping_factor * total
+    `changes` maps each page that was added, removed or whose links
+    changed to the set of pages it linked to before, as returned by
+    `incremental.diff(old_corpus, corpus)`. The ranks are corrected
+    starting from the pages near a change, and only spread to the rest
+    of the corpus until the residual left at any page is at most
+    `tolerance` times the average rank. Converting the dictionaries
+    takes time in the size of the corpus, which `incremental.update`
+    avoids for callers that keep ranks as an array over a link graph.
+
+    Return a dictionary where keys are page names, and values are
+    their estimated PageRank value (a value between 0 and 1). All
+    PageRank values should sum to 1.
+    """
+    graph = link_graph(corpus)
+    previous = np.array([ranks.get(name, 0) for name in graph.names], dtype=float)
+    removed = {page: ranks[page] for page in changes if page in ranks and page not in graph.index}
+    updated, pushes = incremental.update(graph, previous, changes, damping_factor, tolerance, removed)
+    iteration_stats["pushes"] = pushes
+    return graph.to_dict(updated)
+
+
+def personalized_pagerank(corpus, seeds, damping_factor, tolerance=solvers.TOLERANCE):
+    """
+    Return personalized PageRank values for each set of pages in `seeds`.
+
+    A surfer follows links as in `transition_model`, except that instead
+    of jumping to any page in the corpus, it jumps to a page of its seed
+    set chosen at random. Every seed set is ranked in the same sweeps
+    over the links.
+
+    Return a list with a dictionary for each seed set, where keys are
+    page names, and values are their estimated PageRank value (a value
+    between 0 and 1). All PageRank values of a seed set sum to 1.
+    """
+    graph = link_graph(corpus)
+    index = graph.index
+    teleport = np.zeros((len(graph), len(seeds)))
+    for column, pages in enumerate(seeds):
+        if not pages:
+            raise Exception(f"seed set {column} is empty")
+        for page in pages:
+            teleport[index[page], column] = 1 / len(pages)
+    ranks, residuals = solvers.personalized_power_iteration(graph, teleport, damping_factor, tolerance)
+    iteration_stats["iterations"] = max(len(changes) for changes in residuals)
+    iteration_stats["residuals"] = residuals
+    return [graph.to_dict(ranks[:, column]) for column in range(len(seeds))]
 
 
 if __name__ == "__main__":
@@ -0,0 +1,213 @@
+import contextlib
+import multiprocessing
+from statistics import NormalDist
+
+import numpy as np
+
+# Number of random surfers advanced together
+WALKERS = 4096
+
+# Fewest steps each surfer takes, so that where they start matters little
+MIN_STEPS = 100
+
+# Number of lockstep steps whose visits are tallied together
+TALLY_STEPS = 64
+
+# Steps each surfer takes before its visits are first counted, when
+# sampling to a target error
+BURN_IN = MIN_STEPS
+
+# Fewest samples in each batch whose visit frequencies are averaged
+# when sampling to a target error, and the fewest batches to estimate
+# their variance from
+BATCH = 1 << 10
+MIN_BATCHES = 8
+MAX_SAMPLES = 10 ** 8
+
+# Graph inherited by forked workers while they sample
+shared_graph = None
+
+
+def step(graph, pages, damping_factor, rng):
+    """
+    Returns the next page of every surfer currently on `pages`.
+
+    With probability `damping_factor` a surfer follows one of its page's
+    links chosen uniformly, by indexing straight into the page's slice of
+    `graph.targets`. Otherwise, or if the page has no links, it moves to
+    a page chosen uniformly from the whole corpus.
+    """
+    degree = graph.out_degree[pages]
+    follow = (rng.random(len(pages)) < damping_factor) & (degree > 0)
+    following = pages[follow]
+    choice = (rng.random(len(following)) * degree[follow]).astype(np.int64)
+
+    result = rng.integers(0, len(graph), len(pages), dtype=np.int32)
+    result[follow] = graph.targets[graph.offsets[following] + choice]
+    return result
+
+
+def visit_counts(graph, damping_factor, n, walkers=WALKERS, seed=None):
+    """
+    Returns how many times each page is visited over `n` steps of
+    `walkers` independent random surfers advanced in lockstep, each
+    starting on a page chosen at random. Fewer surfers are used if
+    there are too few steps for each to take at least `MIN_STEPS`.
+    """
+    rng = np.random.default_rng(seed)
+    walkers = max(1, min(walkers, n // MIN_STEPS))
+    pages = rng.integers(0, len(graph), walkers, dtype=np.int32)
+    counts, pages = walk(graph, pages, damping_factor, n, rng)
+    return counts
+
+
+def walk(graph, pages, damping_factor, n, rng):
+    """
+    Returns (counts, pages): how many times each page is visited over
+    `n` steps of surfers advanced in lockstep from `pages`, and the
+    pages they end on.
+    """
+    counts = np.zeros(len(graph), dtype=np.int64)
+    remaining = n
+    visits = []
+    while remaining > 0:
+        pages = step(graph, pages, damping_factor, rng)
+        visits.append(pages[:remaining])
+        remaining -= len(visits[-1])
+        if len(visits) == TALLY_STEPS or remaining <= 0:
+            counts += np.bincount(np.concatenate(visits), minlength=len(graph))
+            visits = []
+    return counts, pages
+
+
+def sample_counts(task):
+    """
+    Returns `visit_counts` over the graph shared with forked workers.
+    """
+    damping_factor, n, walkers, seed = task
+    return visit_counts(shared_graph, damping_factor, n, walkers, seed)
+
+
+def continue_batch(task):
+    """
+    Returns `batch_counts` over the graph shared with forked workers.
+    """
+    return batch_counts(shared_graph, *task)
+
+
+def batch_counts(graph, damping_factor, n, walkers, pages, seed):
+    """
+    Returns (counts, pages) from `walk` over `n` steps of surfers that
+    continue from `pages`, or if it is None, of `walkers` surfers that
+    start on pages chosen at random and take `BURN_IN` uncounted steps.
+    """
+    rng = np.random.default_rng(seed)
+    if pages is None:
+        walkers = max(1, min(walkers, n // MIN_STEPS))
+        pages = rng.integers(0, len(graph), walkers, dtype=np.int32)
+        for _ in range(BURN_IN):
+            pages = step(graph, pages, damping_factor, rng)
+    return walk(graph, pages, damping_factor, n, rng)
+
+
+@contextlib.contextmanager
+def process_pool(graph, workers):
+    """
+    Yields a pool of `workers` forked processes that share `graph`, or
+    None if `workers` is at most 1 or the platform cannot fork.
+    """
+    global shared_graph
+
+    if workers is None or workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        yield None
+        return
+    shared_graph = graph
+    try:
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            yield pool
+    finally:
+        shared_graph = None
+
+
+def parallel_visit_counts(graph, damping_factor, n, walkers=WALKERS, seed=None, workers=None):
+    """
+    Returns `visit_counts` for `n` steps in total, split evenly across
+    `workers` processes that each draw from an independent stream
+    derived from `seed`.
+    """
+    with process_pool(graph, workers) as pool:
+        if pool is None:
+            return visit_counts(graph, damping_factor, n, walkers, seed)
+        seeds = np.random.SeedSequence(seed).spawn(workers)
+        tasks = [
+            (damping_factor, n // workers + (i < n % workers), walkers, seeds[i])
+            for i in range(workers)
+        ]
+        return sum(pool.map(sample_counts, tasks))
+
+
+def sample_until(graph, damping_factor, error, confidence=0.95, batch=None, walkers=WALKERS,
+                 seed=None, workers=None, max_samples=MAX_SAMPLES):
+    """
+    Returns (ranks, errors, samples): PageRank estimated by sampling in
+    batches of `batch` steps until it is known to within `error` for
+    every page, at the given `confidence`, or `max_samples` have been
+    drawn. Batches default to `BATCH` samples, or 8 per page in larger
+    corpora, so that a round is not dominated by tallying. `errors`
+    holds the half-width of each page's confidence interval, and
+    `samples` the number of steps drawn.
+
+    Surfers take `BURN_IN` steps before their visits are first counted,
+    so that where they started matters little, and then each batch
+    carries on from where the one before left off. Each surfer takes at
+    least `MIN_STEPS` steps in a batch, by which point it has all but
+    forgotten where the batch began, so the visit frequencies of the
+    batches are close to independent estimates of the ranks. The ranks
+    are their mean, and the confidence intervals come from the spread
+    between batches, using the Student t distribution since there may
+    be only a few. With `workers`, each process carries on its own
+    surfers and samples one batch in each round.
+    """
+    n = len(graph)
+    if batch is None:
+        batch = max(BATCH, 8 * n)
+    sequence = np.random.SeedSequence(seed)
+    total = np.zeros(n)
+    squares = np.zeros(n)
+    batches = 0
+    with process_pool(graph, workers) as pool:
+        surfers = [None] * (1 if pool is None else workers)
+        while True:
+            tasks = [
+                (damping_factor, batch, walkers, pages, child)
+                for pages, child in zip(surfers, sequence.spawn(len(surfers)))
+            ]
+            if pool is None:
+                rounds = [batch_counts(graph, *tasks[0])]
+            else:
+                rounds = pool.map(continue_batch, tasks)
+            surfers = [pages for counts, pages in rounds]
+            for counts, pages in rounds:
+                frequencies = counts / batch
+                total += frequencies
+                squares += frequencies ** 2
+                batches += 1
+
+            if batches >= MIN_BATCHES:
+                ranks = total / batches
+                variance = np.maximum(squares - batches * ranks ** 2, 0) / (batches - 1)
+                errors = t_quantile((1 + confidence) / 2, batches - 1) * np.sqrt(variance / batches)
+                if errors.max() <= error or batches * batch >= max_samples:
+                    return ranks, errors, batches * batch
+
+
+def t_quantile(p, df):
+    """
+    Returns the `p` quantile of the Student t distribution with `df`
+    degrees of freedom, from the normal quantile by the Cornish-Fisher
+    expansion, which is within 0.005 of it from 5 degrees of freedom up.
+    """
+    z = NormalDist().inv_cdf(p)
+    return (z + (z ** 3 + z) / (4 * df)
+            + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * df ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * df ** 3))
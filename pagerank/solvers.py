@@ -0,0 +1,256 @@
+import numpy as np
+
+# Default L1-norm change between sweeps at which a solver stops
+TOLERANCE = 1e-8
+MAX_ITERATIONS = 1000
+
+# Number of personalized rankings computed together
+BLOCK = 64
+
+# Number of links read at a time when streaming a graph
+STREAM_LINKS = 1 << 22
+
+# Number of blocks of pages updated in turn by a Gauss-Seidel sweep
+SEIDEL_BLOCKS = 64
+
+# Iterations between extrapolations
+EXTRAPOLATION_PERIOD = 10
+
+
+def step(graph, ranks, damping_factor):
+    """
+    Returns the ranks after one power iteration step from `ranks`.
+    """
+    return (1 - damping_factor) / len(graph) + damping_factor * graph.propagate(ranks)
+
+
+def power_iteration(graph, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Compute PageRank over a `LinkGraph` by power iteration, starting
+    from equal ranks.
+
+    Each sweep is one sparse matrix-vector product. Iteration stops once
+    the L1 norm of the change in ranks falls below `tolerance`.
+
+    Returns (ranks, residuals): an array of ranks summing to 1, and the
+    L1 change of every sweep, so `len(residuals)` is the number of
+    iterations.
+    """
+    n = len(graph)
+    ranks = np.full(n, 1 / n)
+    residuals = []
+    for iteration in range(max_iterations):
+        updated = step(graph, ranks, damping_factor)
+        residuals.append(float(np.abs(updated - ranks).sum()))
+        ranks = updated
+        if residuals[-1] < tolerance:
+            break
+    return ranks, residuals
+
+
+def residual(graph, ranks, damping_factor):
+    """
+    Returns the L1 norm of the change one power iteration step would make
+    to `ranks`, which is how far they are from solving PageRank however
+    they were computed.
+    """
+    return float(np.abs(step(graph, ranks, damping_factor) - ranks).sum())
+
+
+def gauss_seidel(graph, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                 blocks=SEIDEL_BLOCKS):
+    """
+    Compute PageRank like `power_iteration`, but update the pages in
+    place, `blocks` consecutive ranges of them in turn, so that each
+    range already uses the new ranks of the ranges before it.
+
+    Updating page by page would need a Python loop over every link, so
+    the ranks within a range are updated together from their in-links.
+    Ranks are renormalized after each sweep, and iteration stops once
+    a sweep changes them by less than `tolerance` in L1 norm.
+    """
+    n = len(graph)
+    in_offsets, in_sources = graph.in_links
+    in_targets = np.repeat(np.arange(n), np.diff(in_offsets))
+    degree = np.maximum(graph.out_degree, 1)
+    bounds = np.unique(np.linspace(0, n, blocks + 1).astype(np.int64))
+
+    ranks = np.full(n, 1 / n)
+    share = np.where(graph.dangling, 0, ranks / degree)
+    dangling_rank = ranks[graph.dangling].sum()
+    residuals = []
+    for iteration in range(max_iterations):
+        previous = ranks.copy()
+        for first, last in zip(bounds[:-1], bounds[1:]):
+            links = slice(in_offsets[first], in_offsets[last])
+            received = np.bincount(in_targets[links] - first, weights=share[in_sources[links]],
+                                   minlength=last - first)
+            updated = (1 - damping_factor) / n + damping_factor * (received + dangling_rank / n)
+            dangling = graph.dangling[first:last]
+            dangling_rank += (updated - ranks[first:last])[dangling].sum()
+            ranks[first:last] = updated
+            share[first:last] = np.where(dangling, 0, updated / degree[first:last])
+
+        total = ranks.sum()
+        ranks /= total
+        share /= total
+        dangling_rank /= total
+        residuals.append(float(np.abs(ranks - previous).sum()))
+        if residuals[-1] < tolerance:
+            break
+    return ranks, residuals
+
+
+def aitken(history):
+    """
+    Returns the Aitken delta-squared extrapolation of each page's rank
+    from its last three iterates, or the last iterate where it is
+    undefined.
+    """
+    x0, x1, x2 = history[-3:]
+    curvature = x2 - 2 * x1 + x0
+    defined = curvature != 0
+    extrapolated = x2.copy()
+    extrapolated[defined] -= (x2 - x1)[defined] ** 2 / curvature[defined]
+    return extrapolated
+
+
+def quadratic(history):
+    """
+    Returns the quadratic extrapolation of the ranks from their last four
+    iterates, which removes the components along the second and third
+    eigenvectors by fitting them with least squares.
+    """
+    x0, x1, x2, x3 = history[-4:]
+    y = np.column_stack((x1 - x0, x2 - x0))
+    gamma = np.linalg.lstsq(y, -(x3 - x0), rcond=None)[0]
+    beta = (gamma[0] + gamma[1] + 1, gamma[1] + 1, 1)
+    return beta[0] * x1 + beta[1] * x2 + beta[2] * x3
+
+
+def extrapolated_power_iteration(graph, damping_factor, extrapolate, tolerance=TOLERANCE,
+                                 max_iterations=MAX_ITERATIONS, period=EXTRAPOLATION_PERIOD):
+    """
+    Compute PageRank like `power_iteration`, but every `period`
+    iterations replace the ranks by `extrapolate` (`aitken` or
+    `quadratic`) of the latest iterates, which jumps ahead towards the
+    limit. Extrapolated ranks are clipped to be non-negative and
+    renormalized.
+    """
+    n = len(graph)
+    ranks = np.full(n, 1 / n)
+    history = [ranks]
+    residuals = []
+    for iteration in range(max_iterations):
+        updated = step(graph, ranks, damping_factor)
+        residuals.append(float(np.abs(updated - ranks).sum()))
+        ranks = updated
+        if residuals[-1] < tolerance:
+            break
+        history = history[-3:] + [ranks]
+        if (iteration + 1) % period == 0 and len(history) == 4:
+            extrapolated = np.maximum(extrapolate(history), 0)
+            ranks = extrapolated / extrapolated.sum()
+            history = [ranks]
+    return ranks, residuals
+
+
+def aitken_extrapolation(graph, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Compute PageRank by power iteration with periodic Aitken extrapolation.
+    """
+    return extrapolated_power_iteration(graph, damping_factor, aitken, tolerance, max_iterations)
+
+
+def quadratic_extrapolation(graph, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS):
+    """
+    Compute PageRank by power iteration with periodic quadratic extrapolation.
+    """
+    return extrapolated_power_iteration(graph, damping_factor, quadratic, tolerance, max_iterations)
+
+
+def streaming_power_iteration(graph, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                              block_links=STREAM_LINKS):
+    """
+    Compute PageRank like `power_iteration`, over a `LinkGraph` whose
+    links are too many to hold in memory, such as one read by
+    `edgelist.read`.
+
+    Each sweep reads the links in order, in blocks of about
+    `block_links`, so the links are only ever read sequentially and
+    memory beyond the rank vectors stays bounded by the block size.
+    """
+    n = len(graph)
+    # Pages at which each block of links starts
+    bounds = np.unique(np.concatenate((
+        np.searchsorted(graph.offsets, np.arange(0, graph.offsets[-1], block_links), side="right") - 1,
+        [n]
+    )))
+    ranks = np.full(n, 1 / n)
+    residuals = []
+    for iteration in range(max_iterations):
+        share = np.divide(ranks, graph.out_degree, out=np.zeros(n), where=~graph.dangling)
+        received = np.zeros(n)
+        for first, last in zip(bounds[:-1], bounds[1:]):
+            targets = graph.targets[graph.offsets[first]:graph.offsets[last]]
+            sources = np.repeat(np.arange(first, last), graph.out_degree[first:last])
+            received += np.bincount(targets, weights=share[sources], minlength=n)
+        received += ranks[graph.dangling].sum() / n
+        updated = (1 - damping_factor) / n + damping_factor * received
+        residuals.append(float(np.abs(updated - ranks).sum()))
+        ranks = updated
+        if residuals[-1] < tolerance:
+            break
+    return ranks, residuals
+
+
+def personalized_power_iteration(graph, teleport, damping_factor, tolerance=TOLERANCE,
+                                 max_iterations=MAX_ITERATIONS, block=BLOCK):
+    """
+    Compute personalized PageRank over a `LinkGraph` for every column of
+    the (pages x k) matrix `teleport`, each a distribution over pages.
+
+    With probability `damping_factor` a surfer follows a link, and
+    otherwise jumps to a page drawn from its column of `teleport`. Pages
+    with no links lead to every page equally, as in `transition_model`,
+    so a uniform column gives the same ranks as `power_iteration`.
+
+    Columns are solved `block` at a time, each sweep being one pass over
+    the links for the whole block. Iteration of a block stops once the
+    L1 change of every column falls below `tolerance`.
+
+    Returns (ranks, residuals): a matrix of ranks shaped like `teleport`
+    with columns summing to 1, and for each block the largest L1 change
+    of its columns in every sweep.
+    """
+    teleport = np.asarray(teleport, dtype=float)
+    n, k = teleport.shape
+    ranks = np.empty((n, k))
+    residuals = []
+    for start in range(0, k, block):
+        jump = teleport[:, start:start + block]
+        current = np.full(jump.shape, 1 / n)
+        changes = []
+        for iteration in range(max_iterations):
+            dangling = current[graph.dangling].sum(axis=0)
+            updated = (
+                damping_factor * graph.propagate_links(current)
+                + (1 - damping_factor) * (1 - dangling) * jump
+                + dangling / n
+            )
+            changes.append(float(np.abs(updated - current).sum(axis=0).max()))
+            current = updated
+            if changes[-1] < tolerance:
+                break
+        ranks[:, start:start + block] = current
+        residuals.append(changes)
+    return ranks, residuals
+
+
+# Solvers that iterate_pagerank can use, by name
+SOLVERS = {
+    "power": power_iteration,
+    "gauss-seidel": gauss_seidel,
+    "aitken": aitken_extrapolation,
+    "quadratic": quadratic_extrapolation
+}
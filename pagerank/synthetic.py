@@ -0,0 +1,78 @@
+import argparse
+import os
+import random
+
+PAGE = """<!DOCTYPE html>
+<html lang="en">
+    <head>
+        <title>{title}</title>
+    </head>
+    <body>
+        <h1>{title}</h1>
+
+        <div>Links:</div>
+        <ul>
+{links}        </ul>
+    </body>
+</html>
+"""
+
+LINK = """            <li><a href="{href}">{text}</a></li>
+"""
+
+
+def generate(directory, n_pages, link_exponent=2.0, popularity=2.0, dangling=0.1,
+             external=0.05, max_links=500, seed=None):
+    """
+    Write a synthetic corpus of `n_pages` HTML pages to `directory`.
+
+    The number of links on a page follows a Pareto (power-law)
+    distribution with exponent `link_exponent`, capped at `max_links`,
+    except that a share `dangling` of pages has no links at all. Each
+    link goes to a page drawn with a skew of `popularity`, so that a few
+    pages are linked to from many and most from only a few. A share
+    `external` of links point outside the corpus.
+
+    Only the list of page names is held in memory; each page is
+    written out as soon as its links are drawn.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    # Shuffle which pages are popular, so popularity is unrelated to name
+    names = [f"page{i}.html" for i in range(n_pages)]
+    rng.shuffle(names)
+
+    for i in range(n_pages):
+        links = []
+        if rng.random() >= dangling:
+            for _ in range(min(max_links, int(rng.paretovariate(link_exponent - 1)))):
+                if rng.random() < external:
+                    href = f"https://example.com/{rng.randrange(n_pages)}.html"
+                else:
+                    href = names[int(n_pages * rng.random() ** popularity)]
+                links.append(LINK.format(href=href, text=href))
+        title = names[i][:-len(".html")]
+        with open(os.path.join(directory, names[i]), "w") as f:
+            f.write(PAGE.format(title=title, links="".join(links)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic PageRank corpus.")
+    parser.add_argument("directory")
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--link-exponent", type=float, default=2.0,
+                        help="power-law exponent of the number of links on a page")
+    parser.add_argument("--popularity", type=float, default=2.0,
+                        help="skew of how often the same pages are linked to")
+    parser.add_argument("--dangling", type=float, default=0.1,
+                        help="share of pages without links")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    generate(args.directory, args.pages, args.link_exponent, args.popularity, args.dangling,
+             seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()